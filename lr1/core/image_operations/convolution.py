@@ -1,9 +1,13 @@
 import cv2
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 from lr1.core.entity.image import Image
 from lr1.utils.performance_measurer import PerformanceMeasurer
 
+# число строк, обрабатываемых за один проход свёртки
+ROWS_PER_CHUNK = 64
+
 
 class Convolution:
     def __init__(self, kernel: np.ndarray):
@@ -21,19 +25,23 @@ class Convolution:
         # паддинг по краям нулями
         if data.ndim == 2:  # grayscale
             padded = np.pad(data, ((pad_h, pad_h), (pad_w, pad_w)), mode="constant")
+            h, w = data.shape
+            # окна (h, w, kh, kw) без копирования; сумма по последней оси
+            # совпадает побитово с np.sum(region * kernel) в каждой точке
+            windows = sliding_window_view(padded, (kh, kw))[:h, :w]
             out = np.zeros_like(data, dtype=float)
-            for i in range(data.shape[0]):
-                for j in range(data.shape[1]):
-                    region = padded[i:i + kh, j:j + kw]
-                    out[i, j] = np.sum(region * self.kernel)
+            for i in range(0, h, ROWS_PER_CHUNK):
+                products = windows[i:i + ROWS_PER_CHUNK] * self.kernel
+                out[i:i + ROWS_PER_CHUNK] = products.reshape(products.shape[0], w, kh * kw).sum(axis=-1)
 
         elif data.ndim == 3:  # RGB
             padded = np.pad(data, ((pad_h, pad_h), (pad_w, pad_w), (0, 0)), mode="constant")
+            h, w = data.shape[:2]
             out = np.zeros_like(data, dtype=float)
-            for i in range(data.shape[0]):
-                for j in range(data.shape[1]):
-                    region = padded[i:i + kh, j:j + kw, :]
-                    out[i, j] = np.sum(region * self.kernel[:, :, None], axis=(0, 1))
+            # сдвиговое накопление по отсчётам ядра в том же порядке сложения
+            for di in range(kh):
+                for dj in range(kw):
+                    out += padded[di:di + h, dj:dj + w, :] * self.kernel[di, dj]
         else:
             raise ValueError("Формат изображения не поддерживается")
 
@@ -1,6 +1,10 @@
 from abc import ABC
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Число строк, обрабатываемых за один проход векторизованной свёртки
+CONVOLUTION_ROWS_PER_CHUNK = 64
 
 
 class ImageCat(ABC):
@@ -70,11 +74,13 @@ class ImageCatRGB(ImageCat):
         kh, kw = kernel.shape
         pad_h, pad_w = kh // 2, kw // 2
         padded = np.pad(self.data, ((pad_h, pad_h), (pad_w, pad_w), (0, 0)), mode="constant")
+        h, w = self.data.shape[:2]
         out = np.zeros_like(self.data, dtype=float)
-        for i in range(self.data.shape[0]):
-            for j in range(self.data.shape[1]):
-                region = padded[i:i + kh, j:j + kw, :]
-                out[i, j] = np.sum(region * kernel[:, :, None], axis=(0, 1))
+        # Сдвиговое накопление по отсчётам ядра: порядок сложения совпадает
+        # с поэлементным np.sum(region * kernel, axis=(0, 1)), результат побитово тот же
+        for di in range(kh):
+            for dj in range(kw):
+                out += padded[di:di + h, dj:dj + w, :] * kernel[di, dj]
         return np.clip(out, 0, 255).astype(np.uint8)
 
 
@@ -84,13 +90,17 @@ class ImageCatGray(ImageCat):
         kh, kw = kernel.shape
         pad_h, pad_w = kh // 2, kw // 2
         padded = np.pad(self.data, ((pad_h, pad_h), (pad_w, pad_w)), mode="constant")
+        h, w = self.data.shape
 
+        # Окна (h, w, kh, kw) без копирования; суммирование по последней оси
+        # идёт тем же попарным алгоритмом numpy, что и np.sum(region * kernel)
+        windows = sliding_window_view(padded, (kh, kw))[:h, :w]
         out = np.zeros_like(self.data, dtype=float)
 
-        for i in range(self.data.shape[0]):
-            for j in range(self.data.shape[1]):
-                region = padded[i:i + kh, j:j + kw]
-                out[i, j] = np.sum(region * kernel)
+        # Обрабатываем полосами строк, чтобы не держать в памяти все окна сразу
+        for i in range(0, h, CONVOLUTION_ROWS_PER_CHUNK):
+            products = windows[i:i + CONVOLUTION_ROWS_PER_CHUNK] * kernel
+            out[i:i + CONVOLUTION_ROWS_PER_CHUNK] = products.reshape(products.shape[0], w, kh * kw).sum(axis=-1)
 
         return np.clip(out, 0, 255).astype(np.uint8)
 
@@ -2,81 +2,160 @@ import asyncio
 
 import click
 
+from lr5.config import CACHE_DIR
+from lr5.core.codec.image_codec import CODECS, create_codec
 from lr5.core.service.cat_image_processor import CatImageProcessor
+from lr5.core.storage.image_cache import ImageCache
 from lr5.logging_config import setup_logging, get_logger
 
 setup_logging()
 logger = get_logger(__name__)
 
 
+def async_options(func):
+    """Опции --async/--workers для команд с асинхронной версией."""
+    func = click.option('-w', '--workers',
+                        type=int,
+                        default=None,
+                        help="Размер пула процессов (по умолчанию — число ядер)")(func)
+    return click.option('--async', 'use_async',
+                        is_flag=True,
+                        help="Асинхронная загрузка и обработка в пуле процессов")(func)
+
+
 @click.group()
 @click.version_option("1.0.0")
-def cli():
+@click.option('--codec',
+              default="pil",
+              type=click.Choice(tuple(CODECS)),
+              help="Кодек изображений: pil, cv2 или auto (самый быстрый по микробенчмарку)")
+@click.option('--cache', 'use_cache',
+              is_flag=True,
+              help=f"Кэшировать загруженные изображения на диске ({CACHE_DIR})")
+@click.pass_context
+def cli(ctx: click.Context, codec: str, use_cache: bool):
     """Manage your project with ease."""
+    ctx.obj = {"codec": codec, "cache": use_cache}
+
+
+def create_processor(options: dict, **kwargs) -> CatImageProcessor:
+    """CatImageProcessor с общими опциями группы (кодек, кэш)."""
+    cache = ImageCache(CACHE_DIR) if options["cache"] else None
+    return CatImageProcessor(codec=create_codec(options["codec"]), cache=cache, **kwargs)
 
 
 @cli.command()
 @click.option('-l', '--limit-images',
               required=True,
               type=int)
-def detect_edges(limit_images: int):
+@async_options
+@click.pass_obj
+def detect_edges(options: dict, limit_images: int, use_async: bool, workers: int):
     """Выделяет границы оператором Собеля"""
-    cat_image_processor = CatImageProcessor()
-
-    cat_image_processor.process_images_with_edges(limit_images)
+    with create_processor(options, workers=workers) as cat_image_processor:
+        if use_async:
+            asyncio.run(cat_image_processor.process_images_with_edges_async(limit_images))
+        else:
+            cat_image_processor.process_images_with_edges(limit_images)
 
 
 @cli.command()
 @click.option('-l', '--limit-images',
               required=True,
               type=int)
-def convolution(limit_images: int):
+@click.option('--stream', is_flag=True,
+              help='Потоковый конвейер: скачивание, свёртка и сохранение одновременно')
+@click.option('-q', '--queue-size',
+              default=8,
+              type=int)
+@click.pass_obj
+def convolution(options: dict, limit_images: int, stream: bool, queue_size: int):
     """Применяет свёртку к изображениям"""
-    cat_image_processor = CatImageProcessor()
-
-    cat_image_processor.process_images_with_convolution(limit_images)
-    asyncio.run(cat_image_processor.process_images_with_convolution_async(limit_images))
+    with create_processor(options) as cat_image_processor:
+        if stream:
+            asyncio.run(cat_image_processor.process_images_with_convolution_streaming(limit_images, queue_size))
+            return
+        cat_image_processor.process_images_with_convolution(limit_images)
+        asyncio.run(cat_image_processor.process_images_with_convolution_async(limit_images))
 
 
 @cli.command()
 @click.option('-t', '--threshold',
-              required=False,
+              default=0.01,
               type=float,
               help="Порог для выделения углов")
 @click.option('-l', '--limit-images',
               required=True,
               type=int)
-def detect_corners(threshold: float, limit_images: int):
+@async_options
+@click.pass_obj
+def detect_corners(options: dict, threshold: float, limit_images: int, use_async: bool, workers: int):
     """Выделяет углы на изображениях"""
-    cat_image_processor = CatImageProcessor()
-
-    cat_image_processor.process_images_with_corners(threshold, limit_images)
+    with create_processor(options, workers=workers) as cat_image_processor:
+        if use_async:
+            asyncio.run(cat_image_processor.process_images_with_corners_async(threshold, limit_images))
+        else:
+            cat_image_processor.process_images_with_corners(threshold, limit_images)
 
 
 @cli.command()
 @click.option('-g', '--gamma',
-              required=False,
+              default=10.0,
               type=float,
               help="Значение гамма для коррекции")
 @click.option('-l', '--limit-images',
               required=True,
               type=int)
-def gamma_correction(gamma: float, limit_images: int):
+@async_options
+@click.pass_obj
+def gamma_correction(options: dict, gamma: float, limit_images: int, use_async: bool, workers: int):
     """Применяет гамма-коррекцию к изображениям"""
-    cat_image_processor = CatImageProcessor()
-
-    cat_image_processor.process_images_with_gamma_correction(gamma, limit_images)
+    with create_processor(options, workers=workers) as cat_image_processor:
+        if use_async:
+            asyncio.run(cat_image_processor.process_images_with_gamma_correction_async(gamma, limit_images))
+        else:
+            cat_image_processor.process_images_with_gamma_correction(gamma, limit_images)
 
 
 @cli.command()
 @click.option('-l', '--limit-images',
               required=True,
               type=int)
-def grayscale(limit_images: int):
+@async_options
+@click.pass_obj
+def grayscale(options: dict, limit_images: int, use_async: bool, workers: int):
     """Преобразует изображения в полутоновые"""
-    cat_image_processor = CatImageProcessor()
+    with create_processor(options, workers=workers) as cat_image_processor:
+        if use_async:
+            asyncio.run(cat_image_processor.process_images_with_grayscale_async(limit_images))
+        else:
+            cat_image_processor.process_images_with_grayscale(limit_images)
 
-    cat_image_processor.process_images_with_grayscale(limit_images)
+
+@cli.command()
+@click.option('-o', '--ops',
+              required=True,
+              multiple=True,
+              type=click.Choice(CatImageProcessor.OPERATIONS),
+              help="Операция (можно указать несколько раз)")
+@click.option('-l', '--limit-images',
+              required=True,
+              type=int)
+@click.option('-t', '--threshold',
+              default=0.01,
+              type=float,
+              help="Порог для выделения углов")
+@click.option('-g', '--gamma',
+              default=10.0,
+              type=float,
+              help="Значение гамма для коррекции")
+@click.option('--archive', is_flag=True, default=False,
+              help="Сохранять в архивы из tar-шардов вместо отдельных файлов")
+@click.pass_obj
+def process(options: dict, ops: tuple, limit_images: int, threshold: float, gamma: float, archive: bool):
+    """Выполняет несколько операций над одним набором изображений"""
+    with create_processor(options, archive=archive) as cat_image_processor:
+        cat_image_processor.process_images(list(ops), limit_images, threshold, gamma)
 
 
 if __name__ == "__main__":
@@ -8,6 +8,7 @@ PROJECT_ROOT: Final[Path] = Path(__file__).parent.resolve()
 LOG_DIR: Final[Path] = PROJECT_ROOT / "logs"
 LOG_FILE_PATH: Final[Path] = LOG_DIR / "app.log"
 PHOTO_DIR: Final[Path] = PROJECT_ROOT / "images"
+CACHE_DIR: Final[Path] = PROJECT_ROOT / "cache"
 IMAGE_EXTENSIONS: Final[list[str]] = [".jpg", ".jpeg", ".png"]
 
 # Создаем директорию для логов, если она не существует
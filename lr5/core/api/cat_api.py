@@ -1,15 +1,19 @@
 import asyncio
-import io
 import logging
 import os
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, Optional
 
 import aiohttp
 import numpy as np
 import requests
-from PIL import Image as PILImage
 
+from lr5.core.api.retry_policy import RetryPolicy
 from lr5.core.entity.image_cat import ImageCatFactory, ImageCat
+from lr5.core.codec.image_codec import ImageCodec, PILCodec
+from lr5.core.entity.lazy_image_cat import LazyImageCatFactory
+from lr5.core.storage.image_cache import ImageCache
 from lr5.utils.performance_measurer import PerformanceMeasurer
 
 logger = logging.getLogger("my_logger")
@@ -17,156 +21,382 @@ logger = logging.getLogger("my_logger")
 
 class CatAPI:
     # https://documenter.getpostman.com/view/5578104/RWgqUxxh
-    def __init__(self, api_key: Optional[str] = None):
+    # Максимум изображений, которые API отдаёт за один запрос
+    PAGE_SIZE = 25
+    # Сколько раз дозапрашивать страницы, если из-за повторов id не хватает
+    MAX_PAGE_ROUNDS = 10
+
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: int = 8, request_timeout: float = 30.0,
+                 connect_timeout: float = 10.0, keepalive_timeout: float = 30.0,
+                 retry_policy: Optional[RetryPolicy] = None, cache: Optional[ImageCache] = None,
+                 codec: Optional[ImageCodec] = None):
+        """
+        api_key: ключ TheCatAPI
+        max_concurrency: максимум одновременных соединений при асинхронной загрузке
+        request_timeout: таймаут одного запроса целиком, с
+        connect_timeout: таймаут установки соединения, с
+        keepalive_timeout: сколько держать простаивающее соединение для повторного использования, с
+        retry_policy: политика повторов запросов (по умолчанию RetryPolicy())
+        cache: локальный кэш байтов изображений (None — без кэша)
+        codec: кодек для декодирования изображений (по умолчанию PILCodec)
+        """
+        if max_concurrency < 1:
+            raise ValueError("Число одновременных соединений должно быть не меньше 1")
+        if min(request_timeout, connect_timeout, keepalive_timeout) <= 0:
+            raise ValueError("Таймауты должны быть положительными")
         self.base_url = "https://api.thecatapi.com/v1/images/search"
         self.api_key = api_key
-        self.session = requests.Session()
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
+        self.codec = codec or PILCodec()
+        # Элементы (с ключом error), которые не удалось загрузить в последнем get_cat_images_async
+        self.failed: list[dict] = []
+        # requests.Session не потокобезопасна: у каждого потока (в том числе потоков get_cats) своя
+        self._local = threading.local()
 
-        if self.api_key:
-            self.session.headers.update({'x-api-key': self.api_key})
+    @property
+    def session(self) -> requests.Session:
+        """Сессия requests текущего потока (создаётся при первом обращении из потока)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            if self.api_key:
+                session.headers.update({'x-api-key': self.api_key})
+            self._local.session = session
+        return session
 
     def get_cats(self, limit: int = 1) -> list[dict]:
         """
-        Получает список кошачьих изображений из API
+        Получает список кошачьих изображений из API.
+        API отдаёт не больше PAGE_SIZE изображений за запрос, поэтому недостающие страницы
+        запрашиваются одновременно, пока не наберётся limit уникальных id (повторы отбрасываются).
 
         Args:
-            limit: количество изображений (1-100)
+            limit: количество изображений
 
         Returns:
             Список словарей с информацией об изображениях
         """
-        params = {
+        found: dict[str, dict] = {}
+        page = 0
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for _ in range(CatAPI.MAX_PAGE_ROUNDS):
+                pages = range(page, page + self._pages_needed(limit - len(found)))
+                page += len(pages)
+
+                before = len(found)
+                futures = {executor.submit(self._get_page, p): p for p in pages}
+                for future in as_completed(futures):
+                    try:
+                        batch = future.result()
+                    except requests.exceptions.RequestException as e:
+                        logger.exception("Ошибка при запросе к API: page=%d", futures[future])
+                        continue
+                    for meta in batch:
+                        found.setdefault(meta["id"], meta)
+
+                # Выходим, если набрали нужное число или страницы перестали давать новые id
+                if len(found) >= limit or len(found) == before:
+                    break
+
+        images = list(found.values())[:limit]
+        logger.info("Получены метаданные изображений: count=%d (limit=%d)", len(images), limit)
+        return images
+
+    async def iter_cats_async(self, session: aiohttp.ClientSession, limit: int = 1) -> AsyncIterator[dict]:
+        """
+        Асинхронный генератор метаданных: страницы запрашиваются одновременно через ту же
+        aiohttp-сессию, что и изображения, уникальные изображения отдаются сразу по приходу страницы.
+
+        Args:
+            session: сессия из create_session
+            limit: количество изображений
+        """
+        seen: set[str] = set()
+        page = 0
+        for _ in range(CatAPI.MAX_PAGE_ROUNDS):
+            pages = range(page, page + self._pages_needed(limit - len(seen)))
+            page += len(pages)
+
+            before = len(seen)
+            tasks = [asyncio.create_task(self._get_page_async(session, p)) for p in pages]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    try:
+                        batch = await task
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        logger.exception("Ошибка при запросе к API (async)")
+                        continue
+                    for meta in batch:
+                        if len(seen) >= limit:
+                            return
+                        if meta["id"] not in seen:
+                            seen.add(meta["id"])
+                            yield meta
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            if len(seen) >= limit or len(seen) == before:
+                break
+        logger.info("Получены метаданные изображений (async): count=%d (limit=%d)", len(seen), limit)
+
+    async def get_cats_async(self, session: aiohttp.ClientSession, limit: int = 1) -> list[dict]:
+        """Асинхронная версия get_cats: не блокирует цикл событий на время запроса метаданных."""
+        return [meta async for meta in self.iter_cats_async(session, limit)]
+
+    @staticmethod
+    def _pages_needed(missing: int) -> int:
+        return max(-(-missing // CatAPI.PAGE_SIZE), 1)
+
+    def _page_params(self, page: int) -> dict:
+        return {
             'size': 'low',
             'mime_types': 'jpg',
             'format': 'json',
-            'has_breeds': True,
+            'has_breeds': 1,
             'order': 'RANDOM',
-            'page': 0,
-            'limit': min(limit, 25)
+            'page': page,
+            'limit': CatAPI.PAGE_SIZE
         }
 
-        try:
-            response = self.session.get(self.base_url, params=params)
-            response.raise_for_status()
-            images = response.json()
-            logger.info("Получены метаданные изображений: count=%d (limit=%d)", len(images[:limit]), limit)
-            return images[:limit]
-        except requests.exceptions.RequestException as e:
-            logger.exception("Ошибка при запросе к API")
-            return []
+    async def _get_page_async(self, session: aiohttp.ClientSession, page: int) -> list[dict]:
+        """Асинхронно запрашивает одну страницу метаданных (с повторами)."""
+        return await self.retry_policy.call_async(self._read_page, session, page, description=f"page={page}")
+
+    async def _read_page(self, session: aiohttp.ClientSession, page: int) -> list[dict]:
+        async with session.get(self.base_url, params=self._page_params(page)) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    def _get_page(self, page: int) -> list[dict]:
+        """Запрашивает одну страницу метаданных (до PAGE_SIZE изображений, с повторами)."""
+        return self.retry_policy.call(self._request_page, page, description=f"page={page}")
 
-    def _get_image_data(self, image_url: str) -> Optional[np.ndarray]:
+    def _request_page(self, page: int) -> list[dict]:
+        response = self.session.get(self.base_url, params=self._page_params(page),
+                                    timeout=(self.connect_timeout, self.request_timeout))
+        response.raise_for_status()
+        return response.json()
+
+    def _get_image_bytes(self, image_url: str) -> Optional[bytes]:
         """
-        Получет данные изображения по URL и возвращает их в формате numpy.ndarray.
+        Получает сжатые байты изображения по URL.
 
         Args:
             image_url: URL изображения
 
         Returns:
-            numpy.ndarray или None в случае ошибки
+            bytes или None в случае ошибки
         """
         try:
-            response = self.session.get(image_url)
-            response.raise_for_status()
-            pil_image = PILImage.open(io.BytesIO(response.content))
-            return np.asarray(pil_image)
+            return self.retry_policy.call(self._request_bytes, image_url, description=image_url)
         except Exception as e:
             logger.exception("Ошибка загрузки изображения по URL: %s", image_url)
             return None
 
+    def _request_bytes(self, url: str) -> bytes:
+        if self.cache is None:
+            response = self.session.get(url, timeout=(self.connect_timeout, self.request_timeout))
+            response.raise_for_status()
+            return response.content
+
+        data = self.cache.get(url)
+        if data is not None:
+            logger.debug("Изображение из кэша: %s", url)
+            return data
+
+        response = self.session.get(url, headers=self.cache.validators(url),
+                                    timeout=(self.connect_timeout, self.request_timeout))
+        if response.status_code == 304:
+            data = self.cache.revalidate(url)
+            if data is not None:
+                return data
+            # Запись вытеснили между запросом и ответом — запрашиваем без условий
+            response = self.session.get(url, timeout=(self.connect_timeout, self.request_timeout))
+        response.raise_for_status()
+        self.cache.put(url, response.content, response.headers)
+        return response.content
+
     @PerformanceMeasurer.measure_time_decorator
-    def get_cat_images(self, limit: int = 1) -> list:
+    def get_cat_images(self, limit: int = 1, scale: int = 1, lazy: bool = False) -> list:
         """
         Синхронная версия: получает изображения с информацией о породе.
+
+        Args:
+            limit: количество изображений
+            scale: уменьшение при декодировании (1, 2, 4 или 8)
+            lazy: если True — хранить только сжатые байты и декодировать при первом обращении к data
+                  (после обработки буфер освобождается release()); иначе — только декодированные данные
         """
-        images_data = self.get_cats(limit)
         downloaded_images = []
 
-        for i, img_data in enumerate(images_data, start=1):
-            image_id = img_data['id']
-            image_url = img_data['url']
-            breeds = img_data.get('breeds', [])
-            file_extension = os.path.splitext(image_url)[1]
-
-            image_data = self._get_image_data(image_url)
-            if image_data is None:
-                logger.warning("Пропуск изображения (нет данных): id=%s, url=%s", image_id, image_url)
+        for item in self.index_images(self.get_cats(limit)):
+            image_bytes = self._get_image_bytes(item["url"])
+            if image_bytes is None:
+                logger.warning("Пропуск изображения (нет данных): id=%s, url=%s", item["id"], item["url"])
                 continue
-
-            image_cat = ImageCatFactory.create_image_cat(
-                index=i,
-                filename=image_id,
-                extension=file_extension,
-                data=image_data,
-                url=image_url,
-                breeds=breeds
-            )
-            downloaded_images.append(image_cat)
+            try:
+                downloaded_images.append(self.build_image(item, image_bytes, lazy, scale))
+            except Exception as e:
+                logger.exception("Ошибка декодирования изображения по URL: %s", item["url"])
 
         logger.info("Собрано изображений: %d (limit=%d)", len(downloaded_images), limit)
         return downloaded_images
 
-    @staticmethod
-    async def fetch_image(session: aiohttp.ClientSession, item: dict) -> tuple[int, bytes]:
+    async def fetch_image(self, session: aiohttp.ClientSession, item: dict) -> tuple[int, bytes]:
+        """Загружает байты изображения, повторяя запрос при временных ошибках."""
         idx = item["index"]
         url = item["url"]
         logger.info("Загрузка изображения (async) начата: idx=%d", idx)
-        async with session.get(url) as resp:
-            resp.raise_for_status()
-            data = await resp.read()
+        data = await self.retry_policy.call_async(self._read_bytes, session, url, description=url)
         logger.info("Загрузка изображения (async) завершена: idx=%d", idx)
         return idx, data
 
+    async def _read_bytes(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        if self.cache is None:
+            return await self._download_bytes(session, url)
+
+        # Файлы кэша читаются и пишутся в потоке, чтобы не блокировать цикл событий
+        data = await asyncio.to_thread(self.cache.get, url)
+        if data is not None:
+            logger.debug("Изображение из кэша (async): %s", url)
+            return data
+
+        async with session.get(url, headers=self.cache.validators(url)) as resp:
+            if resp.status != 304:
+                resp.raise_for_status()
+                data = await resp.read()
+                await asyncio.to_thread(self.cache.put, url, data, resp.headers)
+                return data
+
+        data = await asyncio.to_thread(self.cache.revalidate, url)
+        if data is None:
+            # Запись вытеснили между запросом и ответом — запрашиваем без условий
+            data = await self._download_bytes(session, url)
+            await asyncio.to_thread(self.cache.put, url, data)
+        return data
+
+    @staticmethod
+    async def _download_bytes(session: aiohttp.ClientSession, url: str) -> bytes:
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            return await resp.read()
+
     @staticmethod
-    def to_numpy(data_bytes: bytes) -> np.ndarray:
-        pil_image = PILImage.open(io.BytesIO(data_bytes))
-        return np.asarray(pil_image)
+    def index_image(index: int, meta: dict) -> dict:
+        """Закрепляет за метаданными индекс и выделяет поля, нужные для загрузки."""
+        return {
+            "index": index,
+            "id": meta["id"],
+            "url": meta["url"],
+            "breeds": meta.get("breeds", []),
+            "ext": os.path.splitext(meta["url"])[1] or ".jpg",
+        }
+
+    @staticmethod
+    def index_images(images_meta: list[dict]) -> list[dict]:
+        """Закрепляет за метаданными индексы (с 1)."""
+        return [CatAPI.index_image(i, meta) for i, meta in enumerate(images_meta, start=1)]
+
+    def create_session(self) -> aiohttp.ClientSession:
+        """
+        Создаёт aiohttp-сессию с заголовками API.
+        Пул соединений ограничен max_concurrency, соединения переиспользуются (keep-alive),
+        у каждого запроса свой таймаут, поэтому одно медленное изображение не держит остальные.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.max_concurrency,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout, sock_connect=self.connect_timeout)
+        return aiohttp.ClientSession(
+            headers={'x-api-key': self.api_key} if self.api_key else None,
+            connector=connector,
+            timeout=timeout
+        )
+
+    def build_image(self, item: dict, data: bytes, lazy: bool = False, scale: int = 1) -> ImageCat:
+        """
+        Создаёт ImageCat из загруженных байтов.
+
+        Args:
+            item: элемент из index_images
+            data: сжатые байты изображения
+            lazy: если True — хранить сжатые байты и декодировать при обращении к data;
+                  иначе байты декодируются сразу и не сохраняются
+            scale: уменьшение при декодировании (1, 2, 4 или 8)
+        """
+        if lazy:
+            return LazyImageCatFactory.create_image_cat(
+                index=item["index"],
+                filename=item["id"],
+                extension=item["ext"],
+                encoded=data,
+                scale=scale,
+                codec=self.codec,
+                url=item["url"],
+                breeds=item["breeds"]
+            )
+        return ImageCatFactory.create_image_cat(
+            index=item["index"],
+            filename=item["id"],
+            extension=item["ext"],
+            data=self.to_numpy(data, scale),
+            url=item["url"],
+            breeds=item["breeds"]
+        )
+
+    async def _fetch_and_build(self, session: aiohttp.ClientSession, item: dict, lazy: bool,
+                               scale: int = 1) -> ImageCat:
+        """Загружает изображение и декодирует его в пуле потоков, не занимая цикл событий."""
+        idx, data = await self.fetch_image(session, item)
+        image = await asyncio.to_thread(self.build_image, item, data, lazy, scale)
+        logger.debug("Преобразование в ImageCat: idx=%d, id=%s", idx, item["id"])
+        return image
+
+    def to_numpy(self, data_bytes: bytes, scale: int = 1) -> np.ndarray:
+        """Декодирует байты изображения кодеком API; при scale > 1 JPEG уменьшается прямо при декодировании."""
+        return self.codec.decode(data_bytes, scale)
 
     @PerformanceMeasurer.measure_time_decorator
-    async def get_cat_images_async(self, limit: int = 1) -> list[ImageCat]:
+    async def get_cat_images_async(self, limit: int = 1, lazy: bool = False, scale: int = 1) -> list[ImageCat]:
         """
         Асинхронная версия: получает список изображений и формирует объекты ImageCat.
         Индексы закрепляются при получении списка URL.
 
         Args:
             limit: количество изображений
-            save_dir: папка для сохранения исходных файлов; если None — не сохранять
+            lazy: если True — хранить сжатые байты и декодировать при первом обращении к data
+            scale: уменьшение при декодировании (1, 2, 4 или 8)
 
         Returns:
-            Список объектов ImageCat в исходном порядке (по закрепленным индексам)
-        """
-        images_meta = self.get_cats(limit)
-        indexed = [
-            {
-                "index": i,
-                "id": meta["id"],
-                "url": meta["url"],
-                "breeds": meta.get("breeds", []),
-                "ext": os.path.splitext(meta["url"])[1] or ".jpg",
-            }
-            for i, meta in enumerate(images_meta, start=1)
-        ]
-
-        async with aiohttp.ClientSession(headers={'x-api-key': self.api_key} if self.api_key else None) as session:
+            Список объектов ImageCat в исходном порядке (по закрепленным индексам).
+            Изображения, которые не удалось загрузить, пропускаются и попадают в self.failed.
+        """
+        async with self.create_session() as session:
+            indexed = self.index_images(await self.get_cats_async(session, limit))
             logger.info("Начало асинхронной загрузки: count=%d", len(indexed))
-            tasks = [self.fetch_image(session, item) for item in indexed]
-            results: list[tuple[int, bytes]] = await asyncio.gather(*tasks, return_exceptions=False)
+            # Каждое изображение декодируется сразу после своей загрузки, пока остальные ещё качаются.
+            # Ошибка одного изображения не отменяет загрузку остальных
+            tasks = [self._fetch_and_build(session, item, lazy, scale) for item in indexed]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
             logger.info("Асинхронная загрузка завершена")
 
-            image_objs: list[Optional[ImageCat]] = [None] * len(indexed)
-            for (idx, data), item in zip(results, indexed):
-                try:
-                    arr = self.to_numpy(data)
-                    image_cat = ImageCatFactory.create_image_cat(
-                        filename=item["id"],
-                        extension=item["ext"],
-                        data=arr,
-                        url=item["url"],
-                        breeds=item["breeds"]
-                    )
-                    image_objs[idx - 1] = image_cat
-                    logger.debug("Преобразование в ImageCat: idx=%d, id=%s", idx, item["id"])
-                except Exception as e:
-                    logger.exception("Ошибка обработки изображения idx=%d id=%s", idx, item["id"])
+        self.failed = []
+        image_objs: list[Optional[ImageCat]] = [None] * len(indexed)
+        for result, item in zip(results, indexed):
+            if isinstance(result, BaseException):
+                self.failed.append({**item, "error": result})
+                logger.error("Не удалось получить изображение idx=%d id=%s: %r", item["index"], item["id"], result)
+                continue
+            image_objs[item["index"] - 1] = result
 
+        if self.failed:
+            logger.warning("Загружено изображений: %d, с ошибкой: %d", len(indexed) - len(self.failed), len(self.failed))
         return [img for img in image_objs if img is not None]
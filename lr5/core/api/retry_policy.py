@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+import requests
+
+logger = logging.getLogger("my_logger")
+
+
+class RetryPolicy:
+    """
+    Повтор запросов с экспоненциальной задержкой и случайным разбросом (full jitter).
+
+    Повторяются только временные ошибки: сетевые сбои, таймауты и статусы из RETRY_STATUSES.
+    Если сервер прислал Retry-After, ждём столько, сколько он просит (но не больше max_delay).
+    """
+
+    # Статусы, после которых запрос имеет смысл повторить
+    RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 30.0, jitter: bool = True):
+        """
+        max_attempts: общее число попыток, включая первую
+        base_delay: задержка перед первым повтором, с (удваивается с каждой попыткой)
+        max_delay: верхняя граница задержки, с
+        jitter: случайная задержка в [0, backoff] вместо фиксированной
+        """
+        if max_attempts < 1:
+            raise ValueError("Число попыток должно быть не меньше 1")
+        if base_delay < 0 or max_delay < 0:
+            raise ValueError("Задержки не могут быть отрицательными")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Задержка перед повтором номер attempt (с 1).
+
+        Args:
+            attempt: номер повтора
+            retry_after: значение заголовка Retry-After, если есть
+        """
+        requested = RetryPolicy.parse_retry_after(retry_after)
+        if requested is not None:
+            return min(requested, self.max_delay)
+
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After в секундах: число секунд или HTTP-дата."""
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+    @staticmethod
+    def classify(exc: BaseException) -> tuple[bool, Optional[str]]:
+        """Возвращает (можно ли повторить, Retry-After) для ошибки запроса."""
+        if isinstance(exc, aiohttp.ClientResponseError):
+            headers = exc.headers or {}
+            return exc.status in RetryPolicy.RETRY_STATUSES, headers.get("Retry-After")
+        if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+            return (exc.response.status_code in RetryPolicy.RETRY_STATUSES,
+                    exc.response.headers.get("Retry-After"))
+        if isinstance(exc, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError,
+                            requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True, None
+        return False, None
+
+    async def call_async(self, func: Callable[..., Awaitable[Any]], *args, description: str = "") -> Any:
+        """Вызывает корутину func(*args), повторяя её при временных ошибках."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await func(*args)
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, description)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    def call(self, func: Callable[..., Any], *args, description: str = "") -> Any:
+        """Синхронная версия call_async."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return func(*args)
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, description)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    def _next_delay(self, exc: Exception, attempt: int, description: str) -> Optional[float]:
+        """Задержка перед следующей попыткой или None, если повторять не нужно."""
+        retryable, retry_after = RetryPolicy.classify(exc)
+        if not retryable or attempt >= self.max_attempts:
+            return None
+        delay = self.delay(attempt, retry_after)
+        logger.warning("Повтор запроса %s через %.2f с (попытка %d/%d): %r",
+                       description, delay, attempt + 1, self.max_attempts, exc)
+        return delay
@@ -0,0 +1,84 @@
+"""
+Микробенчмарк кодеков изображений.
+
+Запуск: python -m lr5.core.codec.benchmark [--height 480 --width 640 --repeat 5]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from lr5.core.codec.image_codec import ImageCodec, OpenCVCodec, PILCodec
+
+BENCHMARK_FORMATS = ("jpg", "png")
+
+
+def sample_image(height: int = 480, width: int = 640) -> np.ndarray:
+    """Гладкое RGB-изображение с шумом — сжимается похоже на фотографию."""
+    y, x = np.mgrid[0:height, 0:width]
+    rng = np.random.default_rng(0)
+    channels = [
+        (np.sin(x / 31.0) + np.cos(y / 23.0)) * 60 + 128,
+        x / max(width, 1) * 255,
+        y / max(height, 1) * 255,
+    ]
+    data = np.stack(channels, axis=-1) + rng.normal(0, 8, (height, width, 3))
+    return np.clip(data, 0, 255).astype(np.uint8)
+
+
+def _best_time(func, repeat: int) -> float:
+    func()  # прогрев
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_codecs(codecs: list[ImageCodec], formats: tuple = BENCHMARK_FORMATS,
+                     shape: tuple[int, int] = (240, 320), repeat: int = 3) -> dict[tuple[str, str], dict[str, float]]:
+    """
+    Замеряет кодирование и декодирование каждым кодеком.
+
+    Returns:
+        (операция, формат) -> {имя кодека: лучшее время, с}
+    """
+    data = sample_image(*shape)
+    results: dict[tuple[str, str], dict[str, float]] = {}
+    for fmt in formats:
+        # Декодируют все кодеки одни и те же байты
+        encoded = codecs[0].encode(data, fmt)
+        for codec in codecs:
+            results.setdefault(("encode", fmt), {})[codec.name] = _best_time(lambda: codec.encode(data, fmt), repeat)
+            results.setdefault(("decode", fmt), {})[codec.name] = _best_time(lambda: codec.decode(encoded), repeat)
+    return results
+
+
+def fastest(results: dict[tuple[str, str], dict[str, float]],
+            codecs: list[ImageCodec]) -> dict[tuple[str, str], ImageCodec]:
+    """Для каждой пары (операция, формат) — кодек с наименьшим временем."""
+    by_name = {codec.name: codec for codec in codecs}
+    return {key: by_name[min(times, key=times.get)] for key, times in results.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение кодеков изображений")
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    codecs = [PILCodec(), OpenCVCodec()]
+    results = benchmark_codecs(codecs, shape=(args.height, args.width), repeat=args.repeat)
+    winners = fastest(results, codecs)
+
+    names = [codec.name for codec in codecs]
+    print(f"{'операция':<10}{'формат':<8}" + "".join(f"{name + ', мс':>12}" for name in names) + "  лучший")
+    for (op, fmt), times in results.items():
+        row = "".join(f"{times[name] * 1000:>12.2f}" for name in names)
+        print(f"{op:<10}{fmt:<8}{row}  {winners[(op, fmt)].name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import io
+from typing import Optional
+
+import numpy as np
+from PIL import Image as PILImage
+
+# Коэффициенты уменьшения, которые libjpeg умеет получать прямо при декодировании (DCT scaling)
+DECODE_SCALES = (1, 2, 4, 8)
+
+
+def scale_for_size(size: tuple[int, int], target_size: tuple[int, int]) -> int:
+    """Наибольший коэффициент из DECODE_SCALES, при котором изображение size не меньше target_size."""
+    width, height = size
+    target_w, target_h = target_size
+    fitting = [scale for scale in DECODE_SCALES
+               if -(-width // scale) >= target_w and -(-height // scale) >= target_h]
+    return max(fitting, default=1)
+
+
+def open_scaled(pil_image: PILImage.Image, scale: int = 1,
+                target_size: Optional[tuple[int, int]] = None) -> PILImage.Image:
+    """
+    Настраивает декодирование с уменьшением в scale раз (или до target_size).
+    Для JPEG используется draft: уменьшение происходит внутри libjpeg и пиксели полного размера
+    не декодируются вовсе; для остальных форматов изображение уменьшается через reduce.
+    """
+    if scale not in DECODE_SCALES:
+        raise ValueError(f"Коэффициент уменьшения должен быть одним из {DECODE_SCALES}")
+    if target_size is not None:
+        scale = scale_for_size(pil_image.size, target_size)
+    if scale == 1:
+        return pil_image
+
+    width, height = pil_image.size
+    size = (-(-width // scale), -(-height // scale))
+    if pil_image.format == "JPEG":
+        pil_image.draft(pil_image.mode, size)
+    if pil_image.size != size:
+        pil_image = pil_image.reduce(max(round(pil_image.size[0] / size[0]), 1))
+    return pil_image
+
+
+def decode_image(encoded: bytes, scale: int = 1, target_size: Optional[tuple[int, int]] = None) -> np.ndarray:
+    """
+    Декодирует сжатое изображение (JPEG/PNG) в numpy.ndarray.
+
+    Args:
+        encoded: сжатые байты
+        scale: уменьшение при декодировании (1, 2, 4 или 8)
+        target_size: минимальный нужный размер (ширина, высота) — выбирает наибольший подходящий scale
+    """
+    with PILImage.open(io.BytesIO(encoded)) as pil_image:
+        return np.asarray(open_scaled(pil_image, scale, target_size))
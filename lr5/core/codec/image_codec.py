@@ -0,0 +1,186 @@
+import io
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import cv2
+import numpy as np
+from PIL import Image as PILImage
+
+from lr5.core.codec.decoding import DECODE_SCALES, decode_image
+
+logger = logging.getLogger("my_logger")
+
+# Расширение файла -> имя формата
+FORMATS = {
+    "jpg": "jpg",
+    "jpeg": "jpg",
+    "png": "png",
+}
+
+# Качество JPEG по умолчанию у PIL; для OpenCV выставляется то же, чтобы бэкенды давали сопоставимые файлы
+JPEG_QUALITY = 75
+
+
+def image_format(extension: str) -> str:
+    """Имя формата по расширению ('.jpg', 'png', ...)."""
+    ext = (extension or "").lower().lstrip(".")
+    if ext not in FORMATS:
+        raise ValueError(f"Неподдерживаемый формат изображения: {extension}")
+    return FORMATS[ext]
+
+
+def sniff_format(encoded: bytes) -> Optional[str]:
+    """Формат сжатых байтов по сигнатуре (None, если формат неизвестен)."""
+    if encoded[:3] == b"\xff\xd8\xff":
+        return "jpg"
+    if encoded[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    return None
+
+
+class ImageCodec(ABC):
+    """
+    Кодек изображений: сжатые байты <-> numpy.ndarray.
+    Массивы всегда в порядке каналов RGB/RGBA (полутоновые — двумерные), как у PIL.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def decode(self, encoded: bytes, scale: int = 1) -> np.ndarray:
+        """
+        Args:
+            encoded: сжатые байты
+            scale: уменьшение при декодировании (1, 2, 4 или 8)
+        """
+
+    @abstractmethod
+    def encode(self, data: np.ndarray, extension: str) -> bytes:
+        """
+        Args:
+            data: изображение HxW или HxWxC (uint8)
+            extension: расширение файла, определяет формат
+        """
+
+
+class PILCodec(ImageCodec):
+    """Кодек на PIL (JPEG уменьшается при декодировании через draft)."""
+
+    name = "pil"
+
+    PIL_FORMATS = {"jpg": "JPEG", "png": "PNG"}
+
+    def decode(self, encoded: bytes, scale: int = 1) -> np.ndarray:
+        return decode_image(encoded, scale)
+
+    def encode(self, data: np.ndarray, extension: str) -> bytes:
+        buf = io.BytesIO()
+        PILImage.fromarray(data).save(buf, format=PILCodec.PIL_FORMATS[image_format(extension)])
+        return buf.getvalue()
+
+
+class OpenCVCodec(ImageCodec):
+    """
+    Кодек на cv2.imdecode/imencode: работает прямо с буферами байтов.
+    OpenCV хранит каналы как BGR/BGRA, поэтому на входе и выходе каналы переставляются.
+    """
+
+    name = "cv2"
+
+    REDUCED_COLOR = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+    REDUCED_GRAY = {2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+                    8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+
+    def decode(self, encoded: bytes, scale: int = 1) -> np.ndarray:
+        if scale not in DECODE_SCALES:
+            raise ValueError(f"Коэффициент уменьшения должен быть одним из {DECODE_SCALES}")
+        buffer = np.frombuffer(encoded, dtype=np.uint8)
+        if scale == 1:
+            flags = cv2.IMREAD_UNCHANGED
+        else:
+            # Уменьшенное чтение в OpenCV бывает только цветным или полутоновым —
+            # число каналов берём из заголовка, не декодируя пиксели
+            with PILImage.open(io.BytesIO(encoded)) as pil_image:
+                gray = len(pil_image.getbands()) == 1
+            flags = (OpenCVCodec.REDUCED_GRAY if gray else OpenCVCodec.REDUCED_COLOR)[scale]
+
+        data = cv2.imdecode(buffer, flags)
+        if data is None:
+            raise ValueError("Не удалось декодировать изображение")
+        if data.ndim == 3 and data.shape[2] == 3:
+            return cv2.cvtColor(data, cv2.COLOR_BGR2RGB)
+        if data.ndim == 3 and data.shape[2] == 4:
+            return cv2.cvtColor(data, cv2.COLOR_BGRA2RGBA)
+        return data
+
+    def encode(self, data: np.ndarray, extension: str) -> bytes:
+        fmt = image_format(extension)
+        if data.ndim == 3 and data.shape[2] == 3:
+            data = cv2.cvtColor(data, cv2.COLOR_RGB2BGR)
+        elif data.ndim == 3 and data.shape[2] == 4:
+            data = cv2.cvtColor(data, cv2.COLOR_RGBA2BGRA)
+        params = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY] if fmt == "jpg" else []
+        ok, buffer = cv2.imencode("." + fmt, data, params)
+        if not ok:
+            raise ValueError(f"Не удалось закодировать изображение в {fmt}")
+        return buffer.tobytes()
+
+
+class AutoCodec(ImageCodec):
+    """
+    Выбирает для каждого формата и операции самый быстрый бэкенд.
+    Выбор делается один раз — микробенчмарком при первом обращении (см. lr5.core.codec.benchmark).
+    """
+
+    name = "auto"
+
+    def __init__(self, backends: Optional[list[ImageCodec]] = None):
+        self.backends = backends or [PILCodec(), OpenCVCodec()]
+        self._choice: Optional[dict[tuple[str, str], ImageCodec]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def choice(self) -> dict[tuple[str, str], ImageCodec]:
+        """(операция, формат) -> бэкенд."""
+        if self._choice is None:
+            with self._lock:
+                if self._choice is None:
+                    from lr5.core.codec.benchmark import benchmark_codecs, fastest
+
+                    self._choice = fastest(benchmark_codecs(self.backends), self.backends)
+                    logger.info("Выбраны кодеки: %s",
+                                {f"{op}/{fmt}": codec.name for (op, fmt), codec in self._choice.items()})
+        return self._choice
+
+    def __getstate__(self) -> dict:
+        # Блокировка не сериализуется: кодек можно передавать в пул процессов
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def decode(self, encoded: bytes, scale: int = 1) -> np.ndarray:
+        codec = self.choice.get(("decode", sniff_format(encoded)), self.backends[0])
+        return codec.decode(encoded, scale)
+
+    def encode(self, data: np.ndarray, extension: str) -> bytes:
+        return self.choice[("encode", image_format(extension))].encode(data, extension)
+
+
+CODECS = {
+    "pil": PILCodec,
+    "cv2": OpenCVCodec,
+    "auto": AutoCodec,
+}
+
+
+def create_codec(name: str = "pil") -> ImageCodec:
+    """Создаёт кодек по имени: pil, cv2 или auto."""
+    if name not in CODECS:
+        raise ValueError(f"Неизвестный кодек: {name}, доступны: {tuple(CODECS)}")
+    return CODECS[name]()
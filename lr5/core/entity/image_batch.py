@@ -0,0 +1,59 @@
+from typing import Callable
+
+import numpy as np
+
+from lr5.core.entity.image_cat import ImageCat, ImageCatFactory
+
+
+class ImageBatch:
+    """Стек изображений одной формы (N, H, W) или (N, H, W, C) для пакетной обработки."""
+
+    def __init__(self, images: list[ImageCat], positions: list[int]):
+        """
+        images: изображения одной формы
+        positions: позиции изображений в исходном списке (для восстановления порядка)
+        """
+        self.images = images
+        self.positions = positions
+        self.data = np.stack([image.data for image in images])
+
+    @staticmethod
+    def group(images: list[ImageCat]) -> list["ImageBatch"]:
+        """Группирует изображения по форме и типу данных в непрерывные стеки."""
+        groups: dict[tuple, list[int]] = {}
+        for position, image in enumerate(images):
+            groups.setdefault((image.data.shape, image.data.dtype.str), []).append(position)
+        return [ImageBatch([images[p] for p in positions], positions) for positions in groups.values()]
+
+    def to_images(self, data: np.ndarray, suffix: str) -> list[ImageCat]:
+        """Разбивает стек результатов обратно на ImageCat с метаданными исходных изображений."""
+        return [
+            ImageCatFactory.create_image_cat(
+                index=image.index,
+                filename=image.filename + suffix,
+                extension=image.extension,
+                data=out,
+                url=image.url,
+                breeds=image.breeds
+            )
+            for image, out in zip(self.images, data)
+        ]
+
+    @staticmethod
+    def apply(images: list[ImageCat], operation: Callable[[np.ndarray], np.ndarray], suffix: str) -> list[ImageCat]:
+        """
+        Применяет operation один раз к каждому стеку одинаковых по форме изображений.
+
+        Args:
+            images: список изображений любых форм
+            operation: функция над стеком (N, H, W[, C]), возвращающая стек результатов
+            suffix: суффикс имени файла результата
+
+        Returns:
+            Список результатов в порядке исходных изображений
+        """
+        results: list[ImageCat] = [None] * len(images)
+        for batch in ImageBatch.group(images):
+            for position, image in zip(batch.positions, batch.to_images(operation(batch.data), suffix)):
+                results[position] = image
+        return results
@@ -1,18 +1,29 @@
 from abc import ABC
+from typing import Optional
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Число строк, обрабатываемых за один проход векторизованной свёртки
+CONVOLUTION_ROWS_PER_CHUNK = 64
 
 
 class ImageCat(ABC):
     kernel = np.ones((3, 3)) / 100.0
 
-    def __init__(self, index: int, filename: str, extension: str, data: np.ndarray, url: str, breeds: list[dict]):
+    def __init__(self, index: int, filename: str, extension: str, data: np.ndarray, url: str, breeds: list[dict],
+                 encoded: Optional[bytes] = None):
+        """
+        encoded: исходные сжатые байты (например, ответ API), из которых получены data;
+                 позволяют сохранить оригинал без перекодирования
+        """
         self.index = index
         self._filename = filename
         self.extension = extension
         self.data = data
         self.url = url
         self.breeds = breeds
+        self.encoded = encoded
 
     @property
     def filename(self):
@@ -22,6 +33,12 @@ class ImageCat(ABC):
     def filename(self, filename):
         self._filename = filename
 
+    def release(self) -> None:
+        """
+        Освобождает декодированные данные, если их можно получить заново (см. LazyImageCat).
+        У обычного изображения data — единственная копия, поэтому ничего не делает.
+        """
+
     def __add__(self, other):
         if not isinstance(other, ImageCat):
             raise TypeError("Операция сложения поддерживается только между объектами ImageCat")
@@ -56,6 +73,53 @@ class ImageCat(ABC):
             breeds=self.breeds + other.breeds
         )
 
+    def apply_separable_convolution(self, kernel_row: np.ndarray, kernel_col: np.ndarray) -> np.ndarray:
+        """
+        Применяет разделимое ядро outer(kernel_col, kernel_row) двумя одномерными проходами:
+        сначала по строкам, затем по столбцам. Паддинг нулями тот же, что у apply_convolution.
+        """
+        kh, kw = kernel_col.size, kernel_row.size
+        pad_h, pad_w = kh // 2, kw // 2
+        pad = ((pad_h, pad_h), (pad_w, pad_w)) + ((0, 0),) * (self.data.ndim - 2)
+        padded = np.pad(self.data, pad, mode="constant")
+        h, w = self.data.shape[:2]
+
+        rows = np.zeros((padded.shape[0], w) + self.data.shape[2:], dtype=float)
+        for dj in range(kw):
+            rows += padded[:, dj:dj + w] * kernel_row[dj]
+
+        out = np.zeros_like(self.data, dtype=float)
+        for di in range(kh):
+            out += rows[di:di + h] * kernel_col[di]
+        return np.clip(out, 0, 255).astype(np.uint8)
+
+    def apply_box_filter(self, kh: int, kw: int, value: float) -> np.ndarray:
+        """
+        Свёртка с постоянным ядром kh x kw (все элементы равны value) через интегральное изображение:
+        сумма по окну берётся из четырёх отсчётов таблицы, поэтому цена пикселя не зависит от размера окна.
+        Паддинг нулями тот же, что у apply_convolution.
+
+        Для целочисленных данных таблица целая и суммы по окнам точные, для дробных — float64.
+        Результат — сумма окна, умноженная на value и усечённая до uint8; от прямой свёртки
+        он может отличаться на 1 уровень, где точное значение целое (прямая свёртка накапливает
+        ошибку округления по отсчётам ядра), а для дробных данных — и из-за вычитания в таблице.
+        """
+        pad_h, pad_w = kh // 2, kw // 2
+        pad = ((pad_h, kh - 1 - pad_h), (pad_w, kw - 1 - pad_w)) + ((0, 0),) * (self.data.ndim - 2)
+        padded = np.pad(self.data, pad, mode="constant")
+        h, w = self.data.shape[:2]
+
+        # Таблица сумм с нулевой первой строкой и столбцом
+        dtype = np.int64 if np.issubdtype(self.data.dtype, np.integer) else np.float64
+        table = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1) + self.data.shape[2:], dtype=dtype)
+        np.cumsum(padded, axis=0, dtype=dtype, out=table[1:, 1:])
+        np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+
+        window_sums = (table[kh:kh + h, kw:kw + w] - table[:h, kw:kw + w]
+                       - table[kh:kh + h, :w] + table[:h, :w])
+        out = window_sums * value
+        return np.clip(out, 0, 255).astype(np.uint8)
+
     def __str__(self) -> str:
         return f"ImageCat(filename={self.filename}, extension={self.extension}, shape={self.data.shape}, url={self.url})"
 
@@ -70,11 +134,13 @@ class ImageCatRGB(ImageCat):
         kh, kw = kernel.shape
         pad_h, pad_w = kh // 2, kw // 2
         padded = np.pad(self.data, ((pad_h, pad_h), (pad_w, pad_w), (0, 0)), mode="constant")
+        h, w = self.data.shape[:2]
         out = np.zeros_like(self.data, dtype=float)
-        for i in range(self.data.shape[0]):
-            for j in range(self.data.shape[1]):
-                region = padded[i:i + kh, j:j + kw, :]
-                out[i, j] = np.sum(region * kernel[:, :, None], axis=(0, 1))
+        # Сдвиговое накопление по отсчётам ядра: порядок сложения совпадает
+        # с поэлементным np.sum(region * kernel, axis=(0, 1)), результат побитово тот же
+        for di in range(kh):
+            for dj in range(kw):
+                out += padded[di:di + h, dj:dj + w, :] * kernel[di, dj]
         return np.clip(out, 0, 255).astype(np.uint8)
 
 
@@ -84,13 +150,17 @@ class ImageCatGray(ImageCat):
         kh, kw = kernel.shape
         pad_h, pad_w = kh // 2, kw // 2
         padded = np.pad(self.data, ((pad_h, pad_h), (pad_w, pad_w)), mode="constant")
+        h, w = self.data.shape
 
+        # Окна (h, w, kh, kw) без копирования; суммирование по последней оси
+        # идёт тем же попарным алгоритмом numpy, что и np.sum(region * kernel)
+        windows = sliding_window_view(padded, (kh, kw))[:h, :w]
         out = np.zeros_like(self.data, dtype=float)
 
-        for i in range(self.data.shape[0]):
-            for j in range(self.data.shape[1]):
-                region = padded[i:i + kh, j:j + kw]
-                out[i, j] = np.sum(region * kernel)
+        # Обрабатываем полосами строк, чтобы не держать в памяти все окна сразу
+        for i in range(0, h, CONVOLUTION_ROWS_PER_CHUNK):
+            products = windows[i:i + CONVOLUTION_ROWS_PER_CHUNK] * kernel
+            out[i:i + CONVOLUTION_ROWS_PER_CHUNK] = products.reshape(products.shape[0], w, kh * kw).sum(axis=-1)
 
         return np.clip(out, 0, 255).astype(np.uint8)
 
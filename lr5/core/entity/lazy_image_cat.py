@@ -0,0 +1,88 @@
+import io
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import numpy as np
+from PIL import Image as PILImage
+
+from lr5.core.codec.decoding import DECODE_SCALES
+from lr5.core.codec.image_codec import ImageCodec, PILCodec
+from lr5.core.entity.image_cat import ImageCatGray, ImageCatRGB
+
+
+class LazyImageCat:
+    """
+    Примесь к ImageCatRGB/ImageCatGray: хранит сжатые байты и декодирует их
+    только при первом обращении к data. После release() декодированный буфер
+    освобождается и при следующем обращении будет получен из байтов заново.
+    """
+
+    def __init__(self, *args, encoded: bytes, scale: int = 1, codec: Optional[ImageCodec] = None, **kwargs):
+        """
+        scale: уменьшение при декодировании (1, 2, 4 или 8)
+        codec: кодек для декодирования (по умолчанию PILCodec)
+        """
+        self._data: Optional[np.ndarray] = None
+        self.scale = scale
+        self.codec = codec or PILCodec()
+        super().__init__(*args, data=None, encoded=encoded, **kwargs)
+
+    @property
+    def data(self) -> np.ndarray:
+        if self._data is None:
+            self._data = self.codec.decode(self.encoded, self.scale)
+        return self._data
+
+    @data.setter
+    def data(self, value: Optional[np.ndarray]):
+        self._data = value
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._data is not None
+
+    def release(self) -> None:
+        """Освобождает декодированный буфер. Изменения в data при этом теряются."""
+        self._data = None
+
+    @contextmanager
+    def decoded(self) -> Iterator[np.ndarray]:
+        """Декодирует изображение на время блока with и освобождает буфер после него."""
+        try:
+            yield self.data
+        finally:
+            self.release()
+
+
+class LazyImageCatRGB(LazyImageCat, ImageCatRGB):
+    pass
+
+
+class LazyImageCatGray(LazyImageCat, ImageCatGray):
+    pass
+
+
+class LazyImageCatFactory:
+    @staticmethod
+    def create_image_cat(*args, encoded: bytes, scale: int = 1, codec: Optional[ImageCodec] = None, **kwargs):
+        """
+        Создаёт ленивый ImageCat по сжатым байтам. Читается только заголовок:
+        по числу каналов выбирается RGB или grayscale, сами пиксели не декодируются.
+        Пиксели при первом обращении к data декодирует codec (по умолчанию PILCodec).
+
+        Raises:
+            ValueError: если байты не являются изображением или scale не поддерживается
+        """
+        if scale not in DECODE_SCALES:
+            raise ValueError(f"Коэффициент уменьшения должен быть одним из {DECODE_SCALES}")
+        if "index" not in kwargs:
+            kwargs["index"] = 0
+        try:
+            with PILImage.open(io.BytesIO(encoded)) as pil_image:
+                bands = len(pil_image.getbands())
+        except Exception as exc:
+            raise ValueError("Не удалось прочитать заголовок изображения") from exc
+
+        if bands == 1:
+            return LazyImageCatGray(*args, encoded=encoded, scale=scale, codec=codec, **kwargs)
+        return LazyImageCatRGB(*args, encoded=encoded, scale=scale, codec=codec, **kwargs)
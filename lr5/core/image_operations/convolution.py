@@ -1,20 +1,185 @@
 import logging
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
 
 import cv2
 import numpy as np
+from scipy.signal import fftconvolve
 
+from lr5.core.entity.image_batch import ImageBatch
 from lr5.core.entity.image_cat import ImageCatFactory
 from lr5.utils.performance_measurer import PerformanceMeasurer
+from lr5.utils.shared_memory_transport import SharedArray
 
 logger = logging.getLogger(__name__)
 
 
 class Convolution:
-    def __init__(self, kernel: np.ndarray):
+    METHODS = ("auto", "direct", "fft")
+
+    # Относительный порог второго сингулярного числа, ниже которого ядро считается ранга 1
+    SEPARABLE_TOLERANCE = 1e-10
+    # Во сколько раз log2(размер изображения) занижает стоимость FFT на пиксель
+    # относительно числа отсчётов ядра (подобрано замерами на 64x64..1024x768)
+    FFT_COST_FACTOR = 2.0
+    # Значения FFT, отстоящие от целого меньше чем на FFT_SNAP_EPSILON, приравниваются к нему
+    # перед усечением до uint8: шум FFT (порядка 1e-12) иначе срывает целые значения (3.0 -> 2.9999999 -> 2).
+    # Остальные значения усекаются как в apply_convolution. Поэтому для целых ядер результат совпадает
+    # с прямой свёрткой точно, а в общем случае отличается не больше чем на 1 уровень — когда точное
+    # значение лежит ниже целого менее чем на FFT_SNAP_EPSILON (или в пределах шума FFT от целого).
+    FFT_SNAP_EPSILON = 1e-6
+    # Рабочий набор (байт) одного прохода пакетной свёртки — порядка L2-кэша. На элемент входа
+    # приходится BATCH_BYTES_PER_ELEMENT байт float64-буферов: дополненная копия, сумма и произведение.
+    # Замеры (ядро 3x3, 1 ядро): стек 32x32x3 порциями по 14 изображений быстрее поштучного в 2.5 раза,
+    # а для 100x100x3 и больше объединение только вытесняет буферы из кэша — там порция из одного
+    BATCH_CHUNK_BYTES = 1024 * 1024
+    BATCH_BYTES_PER_ELEMENT = 3 * 8
+    # Минимальная площадь ядра, с которой режим "auto" допускает неточные быстрые пути —
+    # box-фильтр и двухпроходную свёртку с множителями, не представимыми точно (отличие до 1 уровня).
+    # Меньшие ядра считаются побитово так же, как прямой свёрткой: выигрыш на них невелик
+    INEXACT_MIN_AREA = 16
+    # Знаменатель 2**k, при котором множители ядра считаются точными (двоично-рациональными):
+    # произведения и суммы с uint8-данными в float64 тогда вычисляются без округления
+    EXACT_DENOMINATOR = 2 ** 8
+
+    # Кэш объектов по ядру (см. cached), свой в каждом процессе; при переполнении
+    # вытесняется давно использованное ядро (LRU)
+    CACHE_SIZE = 8
+    _cache: OrderedDict[tuple, "Convolution"] = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, kernel: np.ndarray, method: str = "auto", tile_size: Optional[int] = None,
+                 workers: int = 1, executor: Optional[Executor] = None,
+                 batch_chunk_bytes: int = BATCH_CHUNK_BYTES):
+        """
+        kernel: двумерное ядро свёртки
+        method: "auto" — выбор между прямой свёрткой и FFT по размеру ядра и изображения,
+                "direct" — всегда прямая (в т.ч. двухпроходная для разделимых ядер),
+                "fft" — всегда через FFT
+        tile_size: сторона тайла в пикселях; если задана, изображение обрабатывается тайлами
+                   с перекрытием, и временная память ограничена одним тайлом
+        workers: число потоков; при workers > 1 изображение делится на полосы строк
+                 (или на тайлы, если задан tile_size), которые сворачиваются параллельно.
+                 numpy и cv2 отпускают GIL, поэтому потоки загружают все ядра без пиклинга
+        executor: пул потоков для блоков; если не задан, объект создаёт свой пул на workers потоков
+                  при первом изображении и переиспользует его (освобождается через shutdown)
+        batch_chunk_bytes: рабочий набор одного прохода convolve_stack (см. BATCH_CHUNK_BYTES)
+        """
         if kernel.ndim != 2:
             raise ValueError("Ядро должно быть двумерным")
+        if method not in Convolution.METHODS:
+            raise ValueError(f"Неизвестный метод свёртки: {method}")
+        if tile_size is not None and tile_size <= 0:
+            raise ValueError("Размер тайла должен быть положительным")
+        if workers < 1:
+            raise ValueError("Число потоков должно быть не меньше 1")
+        if batch_chunk_bytes <= 0:
+            raise ValueError("Размер порции пакетной свёртки должен быть положительным")
         self.kernel = kernel.astype(float)
+        self.method = method
+        self.tile_size = tile_size
+        self.workers = workers
+        self.batch_chunk_bytes = batch_chunk_bytes
+        self.executor = executor
+        self._own_executor: Optional[ThreadPoolExecutor] = None
+        # Объект может быть общим (см. cached): пул создаётся под блокировкой, чтобы он был один
+        self._executor_lock = threading.Lock()
+        # Постоянное ядро (box-фильтр) считается через интегральное изображение
+        self.is_box = bool(self.kernel.size and self.kernel.flat[0] != 0 and np.all(self.kernel == self.kernel.flat[0]))
+
+        factors = self.split_separable(self.kernel)
+        self.separable = factors is not None
+        self.kernel_row, self.kernel_col = factors if factors is not None else (None, None)
+        # Двухпроходная свёртка совпадает с прямой побитово, если все множители точные
+        self.exact_separable = self.separable and all(
+            Convolution.is_exact(factor) for factor in (self.kernel_row, self.kernel_col))
+        logger.debug("Свёртка: ядро %s, разделимое=%s, box=%s, метод=%s",
+                     self.kernel.shape, self.separable, self.is_box, method)
+
+    @staticmethod
+    def cached(kernel: np.ndarray, tile_size: Optional[int] = None) -> "Convolution":
+        """
+        Возвращает объект Convolution для ядра из кэша процесса, создавая его при первом обращении.
+        Используется воркерами пула, чтобы не повторять анализ ядра на каждую задачу.
+        """
+        kernel = np.asarray(kernel, dtype=float)
+        key = (kernel.shape, kernel.tobytes(), tile_size)
+        with Convolution._cache_lock:
+            convolution = Convolution._cache.get(key)
+            if convolution is not None:
+                Convolution._cache.move_to_end(key)
+                return convolution
+        convolution = Convolution(kernel, tile_size=tile_size)
+        with Convolution._cache_lock:
+            Convolution._cache[key] = convolution
+            while len(Convolution._cache) > Convolution.CACHE_SIZE:
+                Convolution._cache.popitem(last=False)
+        return convolution
+
+    @staticmethod
+    def split_separable(kernel: np.ndarray) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        Проверяет ранг ядра через SVD и раскладывает ядро ранга 1 на строку и столбец.
+
+        Returns:
+            (kernel_row, kernel_col), такие что outer(kernel_col, kernel_row) == kernel,
+            или None, если ядро неразделимо
+        """
+        singular = np.linalg.svd(kernel, compute_uv=False)
+        if singular[0] == 0 or (singular.size > 1 and singular[1] > Convolution.SEPARABLE_TOLERANCE * singular[0]):
+            return None
+
+        # Множители берём из самого ядра (строка и столбец через опорный элемент),
+        # а не из векторов SVD: для целых ядер вроде Собеля они остаются точными
+        i, j = np.unravel_index(np.argmax(np.abs(kernel)), kernel.shape)
+        kernel_row = kernel[i, :].copy()
+        kernel_col = kernel[:, j] / kernel[i, j]
+        return kernel_row, kernel_col
+
+    @staticmethod
+    def is_exact(values: np.ndarray) -> bool:
+        """Все значения кратны 1/EXACT_DENOMINATOR (целые ядра, Собель, 1/4 и т.п.)."""
+        scaled = np.asarray(values) * Convolution.EXACT_DENOMINATOR
+        return bool(np.all(scaled == np.round(scaled)))
+
+    def select_strategy(self, shape: tuple, dtype=np.uint8) -> str:
+        """
+        Выбирает способ ручной свёртки для изображения формы shape и типа dtype.
+
+        Контракт режима "auto": для ядер меньше INEXACT_MIN_AREA результат побитово совпадает
+        с прямой свёрткой — двухпроходный путь берётся, только если множители точные
+        (см. is_exact), иначе, например для ядра по умолчанию ones/100, — прямая свёртка.
+        Для ядер от INEXACT_MIN_AREA результат может отличаться от прямой свёртки на 1 уровень:
+        округление промежуточных float в двухпроходной свёртке, box-фильтре и FFT сдвигает
+        значения вблизи целых, а усечение до uint8 превращает это в разницу на 1.
+
+        Постоянное ядро в этом режиме идёт через интегральное изображение (O(1) на пиксель),
+        но только для целочисленных изображений: их суммы по окнам точные.
+        Прямая свёртка стоит kh*kw операций на пиксель (kh+kw для разделимого ядра),
+        FFT — порядка log2 от размера дополненного изображения.
+
+        Returns:
+            "box", "direct", "separable" или "fft"
+        """
+        spatial = "separable" if self.separable else "direct"
+        if self.method == "fft":
+            return "fft"
+        if self.method == "direct":
+            return spatial
+
+        inexact_allowed = self.kernel.size >= Convolution.INEXACT_MIN_AREA
+        if self.is_box and np.issubdtype(dtype, np.integer) and inexact_allowed:
+            return "box"
+        if self.separable and not (self.exact_separable or inexact_allowed):
+            spatial = "direct"
+
+        kh, kw = self.kernel.shape
+        direct_cost = kh + kw if spatial == "separable" else kh * kw
+        fft_cost = Convolution.FFT_COST_FACTOR * np.log2((shape[0] + kh - 1) * (shape[1] + kw - 1))
+        return "fft" if direct_cost > fft_cost else spatial
 
     @PerformanceMeasurer.measure_time_decorator
     def convolution(self, image):
@@ -22,7 +187,7 @@ class Convolution:
         if not hasattr(image, 'apply_convolution'):
             raise ValueError("Класс изображения не поддерживает свёртку")
 
-        out = image.apply_convolution(self.kernel)
+        out = self._convolve_image(image)
 
         return ImageCatFactory.create_image_cat(
             index=image.index,
@@ -35,7 +200,7 @@ class Convolution:
 
     @PerformanceMeasurer.measure_time_decorator
     def convolution_cv2(self, image):
-        out = cv2.filter2D(image.data, -1, self.kernel)
+        out = self.filter_cv2(image.data)
 
         return ImageCatFactory.create_image_cat(
             index=image.index,
@@ -46,13 +211,305 @@ class Convolution:
             breeds=image.breeds
         )
 
+    @PerformanceMeasurer.measure_time_decorator
+    def convolution_batch(self, images: list) -> list:
+        """
+        Пакетная свёртка: изображения одной формы собираются в стек и сворачиваются за один проход.
+
+        Returns:
+            Список результатов в порядке исходных изображений
+        """
+        return ImageBatch.apply(images, self.convolve_stack, "_conv")
+
+    @PerformanceMeasurer.measure_time_decorator
+    def convolution_cv2_batch(self, images: list) -> list:
+        """Пакетная свёртка средствами OpenCV (см. convolution_batch)."""
+        return ImageBatch.apply(images, self.filter_cv2_stack, "_conv_cv2")
+
+    def convolve_stack(self, stack: np.ndarray) -> np.ndarray:
+        """
+        Ручная свёртка стека (N, H, W[, C]): изображения и каналы раскладываются по последней оси
+        массива (H, W, n*C), который сворачивается как одно изображение. Стек идёт порциями
+        (см. batch_step), чтобы временные float-массивы оставались в кэше.
+        """
+        out = np.empty(stack.shape, dtype=np.uint8)
+        step = self.batch_step(stack.shape[1:])
+        for start in range(0, len(stack), step):
+            chunk = stack[start:start + step]
+            channels = self._stack_to_channels(chunk)
+            image = ImageCatFactory.create_image_cat(filename="", extension="", data=channels, url=None, breeds=[])
+            out[start:start + step] = self._channels_to_stack(self._convolve_image(image), chunk.shape)
+        return out
+
+    def batch_step(self, image_shape: tuple) -> int:
+        """Число изображений формы image_shape в одной порции convolve_stack (не меньше одного)."""
+        working_set = int(np.prod(image_shape)) * Convolution.BATCH_BYTES_PER_ELEMENT
+        return max(self.batch_chunk_bytes // max(working_set, 1), 1)
+
+    def filter_cv2_stack(self, stack: np.ndarray) -> np.ndarray:
+        """
+        Свёртка стека (N, H, W[, C]) средствами OpenCV в заранее выделенный выход.
+        OpenCV быстрее всего на 1-4 каналах, а склейка по строкам исказила бы отражение на краях,
+        поэтому изображения стека подаются по одному — без создания ImageCat и замеров на каждое.
+        """
+        out = np.empty_like(stack)
+        for i, data in enumerate(stack):
+            out[i] = (self._filter_cv2_tiled(data) if self.blocked else self._compute_cv2(data)).reshape(data.shape)
+        return out
+
+    @staticmethod
+    def _stack_to_channels(stack: np.ndarray) -> np.ndarray:
+        """(N, H, W[, C]) -> непрерывный (H, W, N*C)."""
+        return np.ascontiguousarray(np.moveaxis(stack, 0, 2)).reshape(stack.shape[1], stack.shape[2], -1)
+
+    @staticmethod
+    def _channels_to_stack(channels: np.ndarray, shape: tuple) -> np.ndarray:
+        """(H, W, N*C) -> (N, H, W[, C])."""
+        return np.moveaxis(channels.reshape(shape[1], shape[2], shape[0], *shape[3:]), 2, 0)
+
+    def _convolve_image(self, image) -> np.ndarray:
+        """Выбирает режим и стратегию ручной свёртки и возвращает uint8-результат."""
+        if self.blocked:
+            return self._convolve_tiled(image)
+
+        strategy = self.select_strategy(image.data.shape, image.data.dtype)
+        if strategy == "box":
+            return self._convolve_box(image)
+        if strategy == "fft":
+            return self._convolve_fft(image)
+        if strategy == "separable":
+            return self._convolve_separable(image)
+        return self._convolve_direct(image)
+
+    def filter_cv2(self, data: np.ndarray) -> np.ndarray:
+        """Свёртка средствами OpenCV: sepFilter2D для разделимых ядер, иначе filter2D."""
+        if self.blocked:
+            return self._filter_cv2_tiled(data)
+        if self.separable:
+            return self._sep_filter2d(data)
+        return self._filter2d(data)
+
+    def _compute(self, strategy: str, image) -> np.ndarray:
+        """Считает свёртку изображения выбранной стратегией (без замера времени)."""
+        if strategy == "box":
+            kh, kw = self.kernel.shape
+            return image.apply_box_filter(kh, kw, self.kernel[0, 0])
+        if strategy == "fft":
+            return self._fft_convolve(image.data)
+        if strategy == "separable":
+            return image.apply_separable_convolution(self.kernel_row, self.kernel_col)
+        return image.apply_convolution(self.kernel)
+
+    def _compute_cv2(self, data: np.ndarray) -> np.ndarray:
+        if self.separable:
+            return cv2.sepFilter2D(data, -1, self.kernel_row, self.kernel_col)
+        return cv2.filter2D(data, -1, self.kernel)
+
+    @PerformanceMeasurer.measure_time_decorator
+    def _convolve_direct(self, image) -> np.ndarray:
+        return self._compute("direct", image)
+
+    @PerformanceMeasurer.measure_time_decorator
+    def _convolve_separable(self, image) -> np.ndarray:
+        return self._compute("separable", image)
+
+    @PerformanceMeasurer.measure_time_decorator
+    def _convolve_box(self, image) -> np.ndarray:
+        return self._compute("box", image)
+
+    @PerformanceMeasurer.measure_time_decorator
+    def _convolve_fft(self, image) -> np.ndarray:
+        return self._compute("fft", image)
+
+    @PerformanceMeasurer.measure_time_decorator
+    def _filter2d(self, data: np.ndarray) -> np.ndarray:
+        return cv2.filter2D(data, -1, self.kernel)
+
+    @PerformanceMeasurer.measure_time_decorator
+    def _sep_filter2d(self, data: np.ndarray) -> np.ndarray:
+        return cv2.sepFilter2D(data, -1, self.kernel_row, self.kernel_col)
+
+    def _fft_convolve(self, data: np.ndarray) -> np.ndarray:
+        """
+        Свёртка через FFT с той же семантикой, что у apply_convolution:
+        корреляция с ядром, паддинг нулями, размер выхода равен размеру входа.
+        """
+        kh, kw = self.kernel.shape
+        # Корреляция = свёртка с отражённым ядром; для RGB ядро общее для всех каналов
+        flipped = self.kernel[::-1, ::-1].reshape((kh, kw) + (1,) * (data.ndim - 2))
+        full = fftconvolve(data.astype(float), flipped, mode="full", axes=(0, 1))
+
+        # Выход apply_convolution начинается со сдвига kh-1-kh//2 в полной свёртке
+        top, left = kh - 1 - kh // 2, kw - 1 - kw // 2
+        out = full[top:top + data.shape[0], left:left + data.shape[1]]
+        nearest = np.rint(out)
+        out = np.where(np.abs(out - nearest) < Convolution.FFT_SNAP_EPSILON, nearest, out)
+        return np.clip(out, 0, 255).astype(np.uint8)
+
+    @property
+    def blocked(self) -> bool:
+        """Обрабатывается ли изображение по частям (тайлами или полосами в потоках)."""
+        return bool(self.tile_size) or self.workers > 1
+
+    def _tile_shape(self, shape: tuple) -> tuple[int, int]:
+        """Размер блока: tile_size x tile_size или полоса строк на поток во всю ширину."""
+        if self.tile_size:
+            return self.tile_size, self.tile_size
+        return max(-(-shape[0] // self.workers), 1), max(shape[1], 1)
+
+    def _run_tiles(self, shape: tuple, process: Callable[[tuple], None]) -> None:
+        """Вызывает process для каждого блока: последовательно или в пуле потоков."""
+        if self.workers > 1:
+            # list() пробрасывает исключения из потоков
+            list(self._thread_pool().map(process, self._tiles(shape)))
+        else:
+            for tile in self._tiles(shape):
+                process(tile)
+
+    def _thread_pool(self) -> Executor:
+        """Пул потоков для блоков: переданный в конструктор или свой, общий для всех изображений."""
+        if self.executor is not None:
+            return self.executor
+        with self._executor_lock:
+            if self._own_executor is None:
+                self._own_executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="convolution")
+            return self._own_executor
+
+    def shutdown(self) -> None:
+        """Останавливает собственный пул потоков (переданный executor не трогается)."""
+        with self._executor_lock:
+            executor, self._own_executor = self._own_executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def __getstate__(self) -> dict:
+        # Пул потоков не сериализуется: в другом процессе он создастся заново
+        state = self.__dict__.copy()
+        state["_own_executor"] = None
+        state["executor"] = None
+        del state["_executor_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._executor_lock = threading.Lock()
+
+    def _tiles(self, shape: tuple):
+        """
+        Разбивает изображение на блоки (см. _tile_shape) с перекрытием (halo) под ядро.
+
+        Yields:
+            (target, source, crop): срезы тайла в выходе, тайла с halo во входе
+            и центральной части внутри результата свёртки тайла с halo
+        """
+        kh, kw = self.kernel.shape
+        halo_top, halo_bottom = kh // 2, kh - 1 - kh // 2
+        halo_left, halo_right = kw // 2, kw - 1 - kw // 2
+        h, w = shape[:2]
+        tile_h, tile_w = self._tile_shape(shape)
+
+        for r0 in range(0, h, tile_h):
+            r1 = min(r0 + tile_h, h)
+            s0, s1 = max(r0 - halo_top, 0), min(r1 + halo_bottom, h)
+            for c0 in range(0, w, tile_w):
+                c1 = min(c0 + tile_w, w)
+                t0, t1 = max(c0 - halo_left, 0), min(c1 + halo_right, w)
+                yield ((slice(r0, r1), slice(c0, c1)),
+                       (slice(s0, s1), slice(t0, t1)),
+                       (slice(r0 - s0, r1 - s0), slice(c0 - t0, c1 - t0)))
+
+    @PerformanceMeasurer.measure_time_decorator
+    def _convolve_tiled(self, image) -> np.ndarray:
+        """
+        Свёртка по тайлам (или полосам в потоках) в заранее выделенный uint8-выход.
+
+        Тайл берётся вместе с halo из соседних пикселей; за границей изображения halo нет,
+        и стратегия дополняет тайл нулями сама — как и глобальный паддинг apply_convolution.
+        Временные float-массивы живут в пределах одного тайла. Блоки пишут в
+        непересекающиеся части выхода, поэтому потокам не нужна синхронизация.
+        """
+        data = image.data
+        tile_shape = self._tile_shape(data.shape)
+        strategy = self.select_strategy(tile_shape, data.dtype)
+        logger.info("Свёртка тайлами: стратегия=%s, тайл=%s, потоков=%d, изображение=%s",
+                    strategy, tile_shape, self.workers, data.shape)
+
+        out = np.empty(data.shape, dtype=np.uint8)
+
+        def process(tile_slices: tuple) -> None:
+            target, source, crop = tile_slices
+            tile = ImageCatFactory.create_image_cat(filename="", extension="", data=data[source], url=None, breeds=[])
+            out[target] = self._compute(strategy, tile)[crop]
+
+        self._run_tiles(data.shape, process)
+        return out
+
+    @PerformanceMeasurer.measure_time_decorator
+    def _filter_cv2_tiled(self, data: np.ndarray) -> np.ndarray:
+        """
+        Свёртка OpenCV по тайлам с тем же результатом, что у filter_cv2 для всего изображения.
+
+        Halo тайла собирается по индексам, отражённым относительно краёв всего изображения
+        (BORDER_REFLECT_101), а не краёв тайла: иначе при halo больше тайла (чётные ядра,
+        маленькие тайлы) отражались бы не те строки. Края самого тайла с halo OpenCV тоже
+        дополняет, но эти пиксели отрезаются и в результат не попадают.
+        """
+        kh, kw = self.kernel.shape
+        top, left = kh // 2, kw // 2
+        h, w = data.shape[:2]
+        out = np.empty_like(data)
+
+        def process(tile_slices: tuple) -> None:
+            (rows, cols), _, _ = tile_slices
+            src_rows = Convolution._reflect_101(np.arange(rows.start - top, rows.stop + kh - 1 - top), h)
+            src_cols = Convolution._reflect_101(np.arange(cols.start - left, cols.stop + kw - 1 - left), w)
+            tile = self._compute_cv2(np.ascontiguousarray(data[np.ix_(src_rows, src_cols)]))
+            out[rows, cols] = tile.reshape(len(src_rows), len(src_cols), *data.shape[2:])[
+                top:top + rows.stop - rows.start, left:left + cols.stop - cols.start]
+
+        self._run_tiles(data.shape, process)
+        return out
+
+    @staticmethod
+    def _reflect_101(indices: np.ndarray, n: int) -> np.ndarray:
+        """Индексы за пределами [0, n) отражаются без повтора края, как BORDER_REFLECT_101 (gfedcb|abcdefgh|gfedcba)."""
+        if n == 1:
+            return np.zeros_like(indices)
+        period = 2 * (n - 1)
+        indices = np.abs(indices) % period
+        return np.where(indices >= n, period - indices, indices)
+
     @staticmethod
     def run_convolution_task(args: tuple):
         """
         Рабочая функция для ProcessPoolExecutor, отдельно от методов класса.
+
+        Args:
+            args: (idx, kernel, data) или (idx, kernel, data, tile_size)
         """
-        idx, kernel, data = args
+        idx, kernel, data, *rest = args
+        tile_size = rest[0] if rest else None
         logger.info("Свёртка (Process) начата: idx=%d, pid=%d", idx, os.getpid())
-        out = cv2.filter2D(data, -1, kernel.astype(float))
+        out = Convolution.cached(kernel, tile_size).filter_cv2(data)
         logger.info("Свёртка (Process) завершена: idx=%d, pid=%d", idx, os.getpid())
         return idx, out, "_conv"
+
+    @staticmethod
+    def run_convolution_task_shared(args: tuple):
+        """
+        Рабочая функция для ProcessPoolExecutor с передачей через разделяемую память:
+        вход и выход лежат в сегментах родителя, в воркер приходят только их spec.
+
+        Args:
+            args: (idx, kernel, src_spec, dst_spec) или (idx, kernel, src_spec, dst_spec, tile_size)
+
+        Returns:
+            (idx, suffix) — результат уже записан в сегмент dst_spec
+        """
+        idx, kernel, src_spec, dst_spec, *rest = args
+        tile_size = rest[0] if rest else None
+        logger.info("Свёртка (Process, shm) начата: idx=%d, pid=%d", idx, os.getpid())
+        with SharedArray.attach(src_spec) as src, SharedArray.attach(dst_spec) as dst:
+            dst.array[...] = Convolution.cached(kernel, tile_size).filter_cv2(src.array).reshape(dst.array.shape)
+        logger.info("Свёртка (Process, shm) завершена: idx=%d, pid=%d", idx, os.getpid())
+        return idx, "_conv"
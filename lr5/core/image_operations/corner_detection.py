@@ -1,3 +1,5 @@
+from typing import Optional
+
 import cv2
 import numpy as np
 from scipy.ndimage import gaussian_filter, maximum_filter
@@ -30,8 +32,9 @@ class CornerDetection:
         """
         self.k = k
         self.sigma = sigma
-        self.conv_x = Convolution(CornerDetection.SOBEL_X)
-        self.conv_y = Convolution(CornerDetection.SOBEL_Y)
+        # Объекты свёртки берутся из кэша процесса: в воркерах пула ядра подготовлены инициализатором
+        self.conv_x = Convolution.cached(CornerDetection.SOBEL_X)
+        self.conv_y = Convolution.cached(CornerDetection.SOBEL_Y)
         self.nms_radius = max(1, int(nms_radius))
 
     def corner_detection(self, image) -> np.ndarray:
@@ -41,8 +44,23 @@ class CornerDetection:
         gray = GrayscaleConverter.to_grayscale(image)
 
         # Градиенты
-        Ix = self.conv_x.convolution(ImageCatFactory.create_image_cat("", "", gray)).data.astype(float)
-        Iy = self.conv_y.convolution(ImageCatFactory.create_image_cat("", "", gray)).data.astype(float)
+        Ix = self.conv_x.convolution(gray).data.astype(float)
+        Iy = self.conv_y.convolution(gray).data.astype(float)
+
+        return self.harris_response(Ix, Iy)
+
+    def corner_detection_from_gradients(self, gx: np.ndarray, gy: np.ndarray) -> np.ndarray:
+        """
+        Карта отклика R по готовым градиентам EdgeDetection.sobel_gradients.
+        Ядра Собеля здесь противоположны по знаку ядрам EdgeDetection, поэтому берутся -gx и -gy,
+        обрезанные до [0, 255] так же, как результат свёртки.
+        """
+        Ix = np.clip(-gx, 0, 255).astype(np.uint8).astype(float)
+        Iy = np.clip(-gy, 0, 255).astype(np.uint8).astype(float)
+        return self.harris_response(Ix, Iy)
+
+    def harris_response(self, Ix: np.ndarray, Iy: np.ndarray) -> np.ndarray:
+        """Отклик Харриса по градиентам"""
 
         # Сглаживаем квадраты градиентов
         Sxx = self._gaussian_blur(Ix * Ix, self.sigma)
@@ -62,8 +80,10 @@ class CornerDetection:
         Возвращает координаты углов (row, col), прошедших порог и NMS.
         threshold — доля от максимального положительного R (0..1).
         """
-        R = self.corner_detection(image)
+        return self.corners_from_response(image, self.corner_detection(image), threshold)
 
+    def corners_from_response(self, image, R: np.ndarray, threshold: float = 0.01):
+        """Отмечает на изображении углы по готовой карте отклика R."""
         R_max = np.max(R)
         if R_max <= 0 or not np.isfinite(R_max):
             return image  # углов нет
@@ -96,9 +116,14 @@ class CornerDetection:
         return gaussian_filter(data, sigma=sigma)
 
     @PerformanceMeasurer.measure_time_decorator
-    def corner_detection_cv2(self, image):
+    def corner_detection_cv2(self, image, gray: Optional[np.ndarray] = None):
+        """
+        Детектор Харриса средствами OpenCV.
+        gray: готовое полутоновое изображение (если уже посчитано)
+        """
 
-        gray = GrayscaleConverter.to_grayscale_cv2(image).data
+        if gray is None:
+            gray = GrayscaleConverter.to_grayscale_cv2(image).data
         gray = np.float32(gray)
         dst = cv2.cornerHarris(gray, 2, 3, 0.04)
         dst = cv2.dilate(dst, None)
@@ -113,3 +138,20 @@ class CornerDetection:
             url=image.url,
             breeds=image.breeds
         )
+
+    @staticmethod
+    def run_corner_detection_task(args: tuple):
+        """
+        Рабочая функция для ProcessPoolExecutor: ручной и cv2-детектор углов.
+
+        Args:
+            args: (idx, threshold, data)
+
+        Returns:
+            (idx, [(data, suffix), ...]) — результаты в порядке manual, cv2
+        """
+        idx, threshold, data = args
+        image = ImageCatFactory.create_image_cat(filename="", extension="", data=data, url=None, breeds=[])
+        detector = CornerDetection()
+        outputs = (detector.get_corners(image, threshold), detector.corner_detection_cv2(image))
+        return idx, [(out.data, out.filename) for out in outputs]
@@ -1,6 +1,9 @@
+from typing import Optional
+
 import cv2
 import numpy as np
 
+from lr5.core.entity.image_batch import ImageBatch
 from lr5.core.entity.image_cat import ImageCatFactory
 from lr5.core.image_operations.convolution import Convolution
 from lr5.core.image_operations.grayscale_converter import GrayscaleConverter
@@ -20,8 +23,9 @@ class EdgeDetection:
                         [1, 2, 1]], dtype=float)
 
     def __init__(self):
-        self.conv_x = Convolution(EdgeDetection.SOBEL_X)
-        self.conv_y = Convolution(EdgeDetection.SOBEL_Y)
+        # Объекты свёртки берутся из кэша процесса: в воркерах пула ядра подготовлены инициализатором
+        self.conv_x = Convolution.cached(EdgeDetection.SOBEL_X)
+        self.conv_y = Convolution.cached(EdgeDetection.SOBEL_Y)
 
     @PerformanceMeasurer.measure_time_decorator
     def edge_detection(self, image):
@@ -40,8 +44,29 @@ class EdgeDetection:
         gx_image = self.conv_x.convolution(temp_im)
         gy_image = self.conv_y.convolution(temp_im)
 
-        gx = gx_image.data.astype(float)
-        gy = gy_image.data.astype(float)
+        return self.edges_from_gradients(image, gx_image.data, gy_image.data)
+
+    @staticmethod
+    def sobel_gradients(gray: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Градиенты Собеля со знаком (без обрезки до uint8) для полутонового изображения.
+        Ядра SOBEL_X/SOBEL_Y разделимы, поэтому оба градиента считаются из двух сглаживаний.
+        Паддинг нулями тот же, что у Convolution, значения целые и точные.
+        """
+        padded = np.pad(gray.astype(float), 1, mode="constant")
+        smooth_rows = padded[:-2] + 2.0 * padded[1:-1] + padded[2:]
+        smooth_cols = padded[:, :-2] + 2.0 * padded[:, 1:-1] + padded[:, 2:]
+        gx = smooth_rows[:, 2:] - smooth_rows[:, :-2]
+        gy = smooth_cols[2:] - smooth_cols[:-2]
+        return gx, gy
+
+    def edges_from_gradients(self, image, gx: np.ndarray, gy: np.ndarray):
+        """
+        Строит карту границ по готовым градиентам.
+        Градиенты обрезаются до [0, 255], как результат свёртки в edge_detection.
+        """
+        gx = np.clip(gx, 0, 255).astype(np.uint8).astype(float)
+        gy = np.clip(gy, 0, 255).astype(np.uint8).astype(float)
 
         magnitude = np.hypot(gx, gy)
 
@@ -62,10 +87,33 @@ class EdgeDetection:
         )
 
     @PerformanceMeasurer.measure_time_decorator
-    def edge_detection_cv2(self, image):
-        """Применяет оператор Собеля к изображению."""
+    def edge_detection_batch(self, images: list) -> list:
+        """Пакетный оператор Собеля: grayscale, градиенты и нормировка считаются по стеку за раз."""
+        return ImageBatch.apply(images, self._edges_stack, "_edge")
+
+    def _edges_stack(self, stack: np.ndarray) -> np.ndarray:
+        gray = GrayscaleConverter.grayscale_stack(stack)
 
-        gray = GrayscaleConverter.to_grayscale_cv2(image).data
+        gx = self.conv_x.convolve_stack(gray).astype(float)
+        gy = self.conv_y.convolve_stack(gray).astype(float)
+
+        magnitude = np.hypot(gx, gy)
+
+        # Нормировка по максимуму каждого изображения отдельно, как в edge_detection
+        max_val = magnitude.max(axis=(1, 2), keepdims=True) if magnitude.size > 0 else np.zeros((len(stack), 1, 1))
+        safe_max = np.where(max_val == 0, 1.0, max_val)
+        normalized = np.where(max_val == 0, 0.0, (magnitude / safe_max) * 255.0)
+        return np.clip(normalized, 0, 255).astype(np.uint8)
+
+    @PerformanceMeasurer.measure_time_decorator
+    def edge_detection_cv2(self, image, gray: Optional[np.ndarray] = None):
+        """
+        Выделяет границы детектором Канни.
+        gray: готовое полутоновое изображение (если уже посчитано)
+        """
+
+        if gray is None:
+            gray = GrayscaleConverter.to_grayscale_cv2(image).data
         edges = cv2.Canny(gray, 100, 200)
         out = edges
 
@@ -77,3 +125,20 @@ class EdgeDetection:
             url=image.url,
             breeds=image.breeds
         )
+
+    @staticmethod
+    def run_edge_detection_task(args: tuple):
+        """
+        Рабочая функция для ProcessPoolExecutor: ручной и cv2-детектор границ.
+
+        Args:
+            args: (idx, data)
+
+        Returns:
+            (idx, [(data, suffix), ...]) — результаты в порядке manual, cv2
+        """
+        idx, data = args
+        image = ImageCatFactory.create_image_cat(filename="", extension="", data=data, url=None, breeds=[])
+        detector = EdgeDetection()
+        outputs = (detector.edge_detection(image), detector.edge_detection_cv2(image))
+        return idx, [(out.data, out.filename) for out in outputs]
@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 
+from lr5.core.entity.image_batch import ImageBatch
 from lr5.core.entity.image_cat import ImageCatFactory
 from lr5.utils.performance_measurer import PerformanceMeasurer
 
@@ -48,3 +49,35 @@ class GammaCorrection:
             url=image.url,
             breeds=image.breeds
         )
+
+    @staticmethod
+    def run_gamma_correction_task(args: tuple):
+        """
+        Рабочая функция для ProcessPoolExecutor: ручная и cv2-гамма-коррекция.
+
+        Args:
+            args: (idx, gamma, data)
+
+        Returns:
+            (idx, [(data, suffix), ...]) — результаты в порядке manual, cv2
+        """
+        idx, gamma, data = args
+        image = ImageCatFactory.create_image_cat(filename="", extension="", data=data, url=None, breeds=[])
+        correction = GammaCorrection(gamma)
+        outputs = (correction.gamma_correction(image), correction.gamma_correction_cv2(image))
+        return idx, [(out.data, out.filename) for out in outputs]
+
+    @PerformanceMeasurer.measure_time_decorator
+    def gamma_correction_batch(self, images: list) -> list:
+        """Пакетная гамма-коррекция: один проход LUT по стеку изображений одной формы."""
+        return ImageBatch.apply(images, lambda stack: self.lut_uint8[stack], f"_gamma{self.gamma}")
+
+    @PerformanceMeasurer.measure_time_decorator
+    def gamma_correction_cv2_batch(self, images: list) -> list:
+        """Пакетная гамма-коррекция средствами OpenCV."""
+        return ImageBatch.apply(images, self._lut_cv2_stack, f"_gamma{self.gamma}_cv2")
+
+    def _lut_cv2_stack(self, stack: np.ndarray) -> np.ndarray:
+        # cv2.LUT принимает двумерную матрицу с каналами: склеиваем изображения по строкам
+        rows = stack.reshape((-1,) + stack.shape[2:])
+        return cv2.LUT(rows, self.lut_uint8).reshape(stack.shape)
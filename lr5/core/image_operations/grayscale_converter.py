@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 
+from lr5.core.entity.image_batch import ImageBatch
 from lr5.core.entity.image_cat import ImageCatFactory
 from lr5.core.entity.image_cat import ImageCatGray
 from lr5.core.entity.image_cat import ImageCatRGB
@@ -53,6 +54,56 @@ class GrayscaleConverter:
             breeds=image.breeds
         )
 
+    @staticmethod
+    def run_grayscale_task(args: tuple):
+        """
+        Рабочая функция для ProcessPoolExecutor: ручное и cv2-преобразование в grayscale.
+
+        Args:
+            args: (idx, data)
+
+        Returns:
+            (idx, [(data, suffix), ...]) — результаты в порядке manual, cv2
+        """
+        idx, data = args
+        image = ImageCatFactory.create_image_cat(filename="", extension="", data=data, url=None, breeds=[])
+        outputs = (GrayscaleConverter.to_grayscale(image), GrayscaleConverter.to_grayscale_cv2(image))
+        return idx, [(out.data, out.filename) for out in outputs]
+
+    @PerformanceMeasurer.measure_time_decorator
+    @staticmethod
+    def to_grayscale_batch(images: list) -> list:
+        """Пакетное преобразование в grayscale: один проход по стеку изображений одной формы."""
+        return ImageBatch.apply(images, GrayscaleConverter.grayscale_stack, "_gray")
+
+    @PerformanceMeasurer.measure_time_decorator
+    @staticmethod
+    def to_grayscale_cv2_batch(images: list) -> list:
+        """Пакетное преобразование в grayscale средствами OpenCV."""
+        return ImageBatch.apply(images, GrayscaleConverter.grayscale_stack_cv2, "_gray_cv2")
+
+    @staticmethod
+    def grayscale_stack(stack: np.ndarray) -> np.ndarray:
+        """Стек (N, H, W, 3) -> (N, H, W); стек полутоновых (N, H, W) копируется."""
+        if stack.ndim == 3:
+            return stack.copy()
+        if stack.ndim != 4:
+            raise ValueError("Изображение должно быть RGB или grayscale")
+        gray = (0.299 * stack[..., 0] +
+                0.587 * stack[..., 1] +
+                0.114 * stack[..., 2])
+        return np.clip(gray, 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def grayscale_stack_cv2(stack: np.ndarray) -> np.ndarray:
+        """То же, что grayscale_stack, через cv2.cvtColor по склеенным по строкам изображениям."""
+        if stack.ndim == 3:
+            return stack.copy()
+        if stack.ndim != 4:
+            raise ValueError("Изображение должно быть RGB или grayscale")
+        rows = stack.reshape(-1, stack.shape[2], stack.shape[3])
+        return cv2.cvtColor(rows, cv2.COLOR_RGB2GRAY).reshape(stack.shape[:3])
+
     @PerformanceMeasurer.measure_time_decorator
     @staticmethod
     def to_rgb(image):
@@ -0,0 +1,34 @@
+from functools import cached_property
+
+import numpy as np
+
+from lr5.core.entity.image_cat import ImageCat
+from lr5.core.image_operations.edge_detection import EdgeDetection
+from lr5.core.image_operations.grayscale_converter import GrayscaleConverter
+
+
+class ImageFeatures:
+    """
+    Общие промежуточные результаты для одного изображения.
+
+    Grayscale и градиенты Собеля считаются при первом обращении и переиспользуются
+    всеми операциями (границы, углы, grayscale), запрошенными для этого изображения.
+    """
+
+    def __init__(self, image: ImageCat):
+        self.image = image
+
+    @cached_property
+    def gray(self) -> ImageCat:
+        """Полутоновое изображение (ручное преобразование)."""
+        return GrayscaleConverter.to_grayscale(self.image)
+
+    @cached_property
+    def gray_cv2(self) -> ImageCat:
+        """Полутоновое изображение (OpenCV)."""
+        return GrayscaleConverter.to_grayscale_cv2(self.image)
+
+    @cached_property
+    def gradients(self) -> tuple[np.ndarray, np.ndarray]:
+        """Градиенты Собеля со знаком (gx, gy) по ручному grayscale."""
+        return EdgeDetection.sobel_gradients(self.gray.data)
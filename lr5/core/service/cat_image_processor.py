@@ -1,35 +1,81 @@
 import asyncio
 import logging
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import Executor
 from pathlib import Path
+from typing import Callable, Optional
 
 import numpy as np
 
 from lr5.config import API_KEY
 from lr5.config import PHOTO_DIR
 from lr5.core.api.cat_api import CatAPI
+from lr5.core.codec.image_codec import ImageCodec
+from lr5.core.entity.image_cat import ImageCatFactory
 from lr5.core.image_operations.convolution import Convolution
 from lr5.core.image_operations.corner_detection import CornerDetection
 from lr5.core.image_operations.edge_detection import EdgeDetection
 from lr5.core.image_operations.gamma_correction import GammaCorrection
 from lr5.core.image_operations.grayscale_converter import GrayscaleConverter
+from lr5.core.image_operations.image_features import ImageFeatures
+from lr5.core.service.streaming_pipeline import StreamingPipeline
+from lr5.core.service.worker_pool import WorkerPool
+from lr5.core.storage.image_archive import ArchiveStorage
+from lr5.core.storage.image_cache import ImageCache
 from lr5.core.storage.image_storage import ImageStorage
 from lr5.utils.performance_measurer import PerformanceMeasurer
+from lr5.utils.shared_memory_transport import SharedMemoryTransport
 
 logger = logging.getLogger("my_logger")
 
 
 class CatImageProcessor:
-    def __init__(self, api_key=API_KEY):
-        self.api = CatAPI(api_key)
-        self.storage = ImageStorage(PHOTO_DIR)
+    # Ядро свёртки по умолчанию
+    CONVOLUTION_KERNEL = np.ones((3, 3)) / 100.0
+    # Операции, доступные в process_images
+    OPERATIONS = ("edges", "corners", "gamma", "grayscale")
+
+    def __init__(self, api_key=API_KEY, workers: Optional[int] = None, cache: Optional[ImageCache] = None,
+                 codec: Optional[ImageCodec] = None, encode_executor: Optional[Executor] = None,
+                 archive: bool = False):
+        """
+        api_key: ключ TheCatAPI
+        workers: размер пула процессов (по умолчанию — число ядер)
+        cache: локальный кэш загруженных изображений (например, ImageCache(CACHE_DIR))
+        codec: кодек изображений для API и хранилища (например, create_codec("auto"))
+        encode_executor: пул для кодирования при асинхронном сохранении (по умолчанию — пул потоков)
+        archive: сохранять изображения в архивы из tar-шардов (ArchiveStorage) вместо отдельных файлов
+        """
+        self.api = CatAPI(api_key, cache=cache, codec=codec)
+        storage_class = ArchiveStorage if archive else ImageStorage
+        self.storage = storage_class(PHOTO_DIR, codec=codec, executor=encode_executor)
         self.edge_detector = EdgeDetection()
+        # Пул живёт вместе с процессором и запускается при первой задаче
+        self.pool = WorkerPool(workers, kernels={
+            "convolution": CatImageProcessor.CONVOLUTION_KERNEL,
+            "sobel_x": EdgeDetection.SOBEL_X,
+            "sobel_y": EdgeDetection.SOBEL_Y,
+            "corner_sobel_x": CornerDetection.SOBEL_X,
+            "corner_sobel_y": CornerDetection.SOBEL_Y,
+        })
 
         self.photo_dir = Path(PHOTO_DIR)
         self.originals_dir = self.photo_dir / "originals"
         self.manual_count_dir = self.photo_dir / "manual_count"
         self.cv2_dir = self.photo_dir / "cv2"
 
+    def shutdown(self) -> None:
+        """Останавливает пул процессов, закрывает хранилище и сохраняет индекс кэша."""
+        self.pool.shutdown()
+        self.storage.close()
+        if self.api.cache is not None:
+            self.api.cache.close()
+
+    def __enter__(self) -> "CatImageProcessor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
     def process_images_with_edges(self, limit: int = 5):
         """
         Главный метод для обработки изображений:
@@ -42,14 +88,14 @@ class CatImageProcessor:
             limit: Количество изображений для обработки.
         """
 
-        images = self.api.get_cat_images(limit=limit)
+        images = self.api.get_cat_images(limit=limit, lazy=True)
         if not images:
             logger.warning("Не удалось получить изображения от API (limit=%d).", limit)
             return
 
         for image in images:
             try:
-                original_path = self.storage.save_image(image, self.originals_dir)
+                original_path = self.storage.save_original(image, self.originals_dir)
                 logger.info("Оригинал сохранен: %s", original_path)
 
                 edges_image = self.edge_detector.edge_detection(image)
@@ -61,6 +107,8 @@ class CatImageProcessor:
                 logger.info("Границы (cv2) сохранены: %s", edges_path)
             except Exception as e:
                 logger.exception("Ошибка при обработке изображения")
+            finally:
+                image.release()
 
     @PerformanceMeasurer.measure_time_decorator
     def process_images_with_convolution(self, limit: int = 5):
@@ -77,9 +125,9 @@ class CatImageProcessor:
             limit: Количество изображений для обработки.
         """
 
-        kernel = np.ones((3, 3)) / 100.0
+        kernel = CatImageProcessor.CONVOLUTION_KERNEL
 
-        images = self.api.get_cat_images(limit=limit)
+        images = self.api.get_cat_images(limit=limit, lazy=True)
         if not images:
             logger.warning("Не удалось получить изображения от API (limit=%d).", limit)
             return
@@ -88,7 +136,7 @@ class CatImageProcessor:
 
         for image in images:
             try:
-                original_path = self.storage.save_image(image, self.originals_dir)
+                original_path = self.storage.save_original(image, self.originals_dir)
                 logger.info("Оригинал сохранен: %s", original_path)
 
                 convolved_image = convolution.convolution(image)
@@ -96,6 +144,8 @@ class CatImageProcessor:
                 logger.info("Свёртка (manual) сохранена: %s", convolved_path)
             except Exception as e:
                 logger.exception("Ошибка при обработке изображения")
+            finally:
+                image.release()
 
     @PerformanceMeasurer.measure_time_decorator
     async def process_images_with_convolution_async(self, limit: int = 5):
@@ -105,52 +155,74 @@ class CatImageProcessor:
         - параллельная свёртка в процессах с сохранением порядка,
         - асинхронное сохранение результатов.
         """
-        kernel = np.ones((3, 3)) / 100.0
+        kernel = CatImageProcessor.CONVOLUTION_KERNEL
 
-        # 1. Асинхронно получаем изображения с фиксированными индексами
-        images = await self.api.get_cat_images_async(limit=limit)
+        # 1. Асинхронно получаем изображения с фиксированными индексами (сжатыми, без декодирования)
+        images = await self.api.get_cat_images_async(limit=limit, lazy=True)
         if not images:
             logger.warning("Не удалось получить изображения от API (async, limit=%d).", limit)
             return
 
         # 2. Асинхронно сохраняем оригиналы
-        save_tasks = [self.storage.save_image_async(img, self.originals_dir) for img in images]
+        save_tasks = [self.storage.save_original_async(img, self.originals_dir) for img in images]
         logger.info("Сохранение оригиналов (async) начато: count=%d", len(save_tasks))
         await asyncio.gather(*save_tasks)
         logger.info("Сохранение оригиналов (async) завершено")
 
-        # 3. Параллельная свёртка: передаём минимальный набор данных
-        args_list = []
-        for idx, img in enumerate(images, start=1):
-            args_list.append((idx, kernel, img.data))
-
-        logger.info("Свёртка в процессах начата: count=%d", len(args_list))
-        loop = asyncio.get_running_loop()
-        with ProcessPoolExecutor() as pool:
-            results = await asyncio.gather(*[
-                loop.run_in_executor(pool, Convolution.run_convolution_task, args)
-                for args in args_list
-            ])
-        logger.info("Свёртка в процессах завершена")
-
-        # Создание объектов и асинхронное сохранение
-        from lr5.core.entity.image_cat import ImageCatFactory
-        save_conv_tasks = []
-        for idx, convolved_data, suffix in results:
-            img = images[idx - 1]
-            out_img = ImageCatFactory.create_image_cat(
-                index=img.index,
-                filename=img.filename + suffix,
-                extension=img.extension,
-                data=convolved_data,
-                url=img.url,
-                breeds=img.breeds
-            )
-            save_conv_tasks.append(self.storage.save_image_async(out_img, self.manual_count_dir))
+        # 3. Параллельная свёртка: одновременно в работе не больше изображений, чем процессов в пуле
+        limiter = asyncio.Semaphore(self.pool.size)
+        logger.info("Свёртка в процессах начата: count=%d", len(images))
+        await asyncio.gather(*[self._convolve_shared_async(limiter, kernel, idx, img)
+                               for idx, img in enumerate(images, start=1)])
+        logger.info("Свёртка в процессах и сохранение результатов (async) завершены")
+
+    async def _convolve_shared_async(self, limiter: asyncio.Semaphore, kernel: np.ndarray, idx: int, img) -> None:
+        """
+        Свёртка одного изображения в пуле: вход и выход лежат в разделяемой памяти,
+        в процесс уходят только имена сегментов и формы. Декодированный буфер освобождается
+        после копирования в сегмент, сегменты — после сохранения результата.
+        """
+        async with limiter:
+            with SharedMemoryTransport() as transport:
+                try:
+                    src = transport.from_array(await asyncio.to_thread(getattr, img, "data"))
+                finally:
+                    img.release()
+                dst = transport.create(src.array.shape, src.array.dtype)
+                _, suffix = await self.pool.run(Convolution.run_convolution_task_shared,
+                                                (idx, kernel, src.spec, dst.spec))
+
+                # Сохранение прямо из разделяемой памяти
+                out_image = ImageCatFactory.create_image_cat(
+                    index=img.index,
+                    filename=img.filename + suffix,
+                    extension=img.extension,
+                    data=dst.array,
+                    url=img.url,
+                    breeds=img.breeds
+                )
+                await self.storage.save_image_async(out_image, self.manual_count_dir)
+                # Отпускаем view на сегмент до его удаления
+                del out_image
 
-        logger.info("Сохранение результатов свёртки (async) начато: count=%d", len(save_conv_tasks))
-        await asyncio.gather(*save_conv_tasks)
-        logger.info("Сохранение результатов свёртки (async) завершено")
+    @PerformanceMeasurer.measure_time_decorator
+    async def process_images_with_convolution_streaming(self, limit: int = 5, queue_size: int = 8) -> int:
+        """
+        Потоковая версия свёртки: скачивание, свёртка в процессах и сохранение идут одновременно,
+        каждое изображение сохраняется сразу после обработки.
+        Память ограничена глубиной очередей между стадиями (queue_size).
+
+        Returns:
+            Количество сохранённых файлов (оригиналы и результаты)
+        """
+        pipeline = StreamingPipeline(self.api, self.storage, self.pool, queue_size=queue_size)
+        return await pipeline.run(
+            limit,
+            Convolution.run_convolution_task,
+            (CatImageProcessor.CONVOLUTION_KERNEL,),
+            self.originals_dir,
+            self.manual_count_dir
+        )
 
     def process_images_with_corners(self, threshold: float = 0.01, limit: int = 5):
         """
@@ -164,7 +236,7 @@ class CatImageProcessor:
             threshold: Порог для выделения углов.
             limit: Количество изображений для обработки.
         """
-        images = self.api.get_cat_images(limit=limit)
+        images = self.api.get_cat_images(limit=limit, lazy=True)
         if not images:
             logger.warning("Не удалось получить изображения от API (limit=%d).", limit)
             return
@@ -173,7 +245,7 @@ class CatImageProcessor:
 
         for image in images:
             try:
-                original_path = self.storage.save_image(image, self.originals_dir)
+                original_path = self.storage.save_original(image, self.originals_dir)
                 logger.info("Оригинал сохранен: %s", original_path)
 
                 corners_image = corner_detector.get_corners(image, threshold)
@@ -185,6 +257,8 @@ class CatImageProcessor:
                 logger.info("Углы (cv2) сохранены: %s", corners_path_cv2)
             except Exception as e:
                 logger.exception("Ошибка при обработке изображения")
+            finally:
+                image.release()
 
     def process_images_with_gamma_correction(self, gamma: float = 10.0, limit: int = 5):
         """
@@ -198,7 +272,7 @@ class CatImageProcessor:
             gamma: Значение гамма для коррекции.
             limit: Количество изображений для обработки.
         """
-        images = self.api.get_cat_images(limit=limit)
+        images = self.api.get_cat_images(limit=limit, lazy=True)
         if not images:
             logger.warning("Не удалось получить изображения от API (limit=%d).", limit)
             return
@@ -207,7 +281,7 @@ class CatImageProcessor:
 
         for image in images:
             try:
-                original_path = self.storage.save_image(image, self.originals_dir)
+                original_path = self.storage.save_original(image, self.originals_dir)
                 logger.info("Оригинал сохранен: %s", original_path)
 
                 gamma_corrected_image = gamma_correction.gamma_correction(image)
@@ -219,6 +293,8 @@ class CatImageProcessor:
                 logger.info("Гамма-коррекция (cv2) сохранена: %s", gamma_corrected_path_cv2)
             except Exception as e:
                 logger.exception("Ошибка при обработке изображения")
+            finally:
+                image.release()
 
     def process_images_with_grayscale(self, limit: int = 5):
         """
@@ -231,14 +307,14 @@ class CatImageProcessor:
         Args:
             limit: Количество изображений для обработки.
         """
-        images = self.api.get_cat_images(limit=limit)
+        images = self.api.get_cat_images(limit=limit, lazy=True)
         if not images:
             logger.warning("Не удалось получить изображения от API (limit=%d).", limit)
             return
 
         for image in images:
             try:
-                original_path = self.storage.save_image(image, self.originals_dir)
+                original_path = self.storage.save_original(image, self.originals_dir)
                 logger.info("Оригинал сохранен: %s", original_path)
 
                 grayscale_image = GrayscaleConverter.to_grayscale(image)
@@ -250,3 +326,162 @@ class CatImageProcessor:
                 logger.info("Grayscale (cv2) сохранен: %s", grayscale_path_cv2)
             except Exception as e:
                 logger.exception("Ошибка при обработке изображения")
+            finally:
+                image.release()
+
+    @PerformanceMeasurer.measure_time_decorator
+    async def process_images_with_edges_async(self, limit: int = 5):
+        """Асинхронная версия process_images_with_edges: детекторы границ работают в пуле процессов."""
+        await self._process_images_async(limit, EdgeDetection.run_edge_detection_task, (), "Границы")
+
+    @PerformanceMeasurer.measure_time_decorator
+    async def process_images_with_corners_async(self, threshold: float = 0.01, limit: int = 5):
+        """Асинхронная версия process_images_with_corners: детекторы углов работают в пуле процессов."""
+        await self._process_images_async(limit, CornerDetection.run_corner_detection_task, (threshold,), "Углы")
+
+    @PerformanceMeasurer.measure_time_decorator
+    async def process_images_with_gamma_correction_async(self, gamma: float = 10.0, limit: int = 5):
+        """Асинхронная версия process_images_with_gamma_correction: коррекция в пуле процессов."""
+        GammaCorrection(gamma)  # проверка параметра до загрузки изображений
+        await self._process_images_async(limit, GammaCorrection.run_gamma_correction_task, (gamma,),
+                                         "Гамма-коррекция")
+
+    @PerformanceMeasurer.measure_time_decorator
+    async def process_images_with_grayscale_async(self, limit: int = 5):
+        """Асинхронная версия process_images_with_grayscale: преобразование в пуле процессов."""
+        await self._process_images_async(limit, GrayscaleConverter.run_grayscale_task, (), "Grayscale")
+
+    async def _process_images_async(self, limit: int, task: Callable[[tuple], tuple], params: tuple, label: str):
+        """
+        Общая схема асинхронной обработки:
+        - асинхронное скачивание и сохранение оригиналов,
+        - параллельная обработка в процессах с сохранением порядка по индексам,
+        - асинхронное сохранение результатов (manual и cv2).
+
+        Args:
+            limit: Количество изображений для обработки.
+            task: рабочая функция пула, принимает (idx, *params, data)
+                  и возвращает (idx, [(data, suffix) для manual, (data, suffix) для cv2])
+            params: параметры операции
+            label: название операции для логов
+        """
+        images = await self.api.get_cat_images_async(limit=limit, lazy=True)
+        if not images:
+            logger.warning("Не удалось получить изображения от API (async, limit=%d).", limit)
+            return
+
+        await asyncio.gather(*[self.storage.save_original_async(img, self.originals_dir) for img in images])
+        logger.info("Оригиналы (async) сохранены: count=%d", len(images))
+
+        # Одновременно в работе не больше изображений, чем процессов в пуле:
+        # каждое декодируется перед отправкой в пул, а результаты сохраняются по готовности
+        limiter = asyncio.Semaphore(self.pool.size)
+        logger.info("%s: обработка в процессах начата: count=%d", label, len(images))
+        results = await asyncio.gather(*[
+            self._process_image_async(limiter, task, idx, params, img)
+            for idx, img in enumerate(images, start=1)
+        ], return_exceptions=True)
+
+        saved = 0
+        for img, result in zip(images, results):
+            if isinstance(result, BaseException):
+                logger.error("Ошибка при обработке изображения %s: %s", img.filename, result)
+                continue
+            saved += result
+        logger.info("%s (async) сохранены: count=%d", label, saved)
+
+    async def _process_image_async(self, limiter: asyncio.Semaphore, task: Callable[[tuple], tuple], idx: int,
+                                   params: tuple, img) -> int:
+        """
+        Обрабатывает одно изображение в пуле и сохраняет результаты (manual и cv2).
+        Декодированный буфер освобождается сразу после обработки.
+
+        Returns:
+            Количество сохранённых файлов
+        """
+        async with limiter:
+            try:
+                decode = asyncio.to_thread(getattr, img, "data")
+                _, outputs = await self.pool.run(task, (idx, *params, await decode))
+            finally:
+                img.release()
+
+        await asyncio.gather(*[
+            self.storage.save_image_async(ImageCatFactory.create_image_cat(
+                index=img.index,
+                filename=img.filename + suffix,
+                extension=img.extension,
+                data=data,
+                url=img.url,
+                breeds=img.breeds
+            ), directory)
+            for (data, suffix), directory in zip(outputs, (self.manual_count_dir, self.cv2_dir))
+        ])
+        return len(outputs)
+
+    @PerformanceMeasurer.measure_time_decorator
+    def process_images(self, ops: list[str], limit: int = 5, threshold: float = 0.01, gamma: float = 10.0):
+        """
+        Выполняет несколько операций над одним набором изображений:
+        1. Один раз запрашивает изображения через API.
+        2. Один раз сохраняет оригиналы.
+        3. Для каждого изображения один раз считает grayscale и градиенты Собеля
+           и строит из них все запрошенные результаты.
+        4. Сохраняет результаты.
+
+        Args:
+            ops: операции из CatImageProcessor.OPERATIONS (edges, corners, gamma, grayscale)
+            limit: Количество изображений для обработки.
+            threshold: Порог для выделения углов.
+            gamma: Значение гамма для коррекции.
+        """
+        unknown = [op for op in ops if op not in CatImageProcessor.OPERATIONS]
+        if unknown or not ops:
+            raise ValueError(f"Неизвестные операции: {unknown}, доступны: {CatImageProcessor.OPERATIONS}")
+
+        images = self.api.get_cat_images(limit=limit, lazy=True)
+        if not images:
+            logger.warning("Не удалось получить изображения от API (limit=%d).", limit)
+            return
+
+        corner_detector = CornerDetection()
+        gamma_correction = GammaCorrection(gamma)
+
+        # Запись идёт в фоновых потоках, обработка не ждёт диска
+        with self.storage.writer() as writer:
+            pending = []
+            for image in images:
+                try:
+                    pending.append(writer.submit(image, self.originals_dir, original=True))
+
+                    features = ImageFeatures(image)
+                    for op in dict.fromkeys(ops):
+                        if op == "edges":
+                            results = (self.edge_detector.edges_from_gradients(image, *features.gradients),
+                                       self.edge_detector.edge_detection_cv2(image, features.gray_cv2.data))
+                        elif op == "corners":
+                            response = corner_detector.corner_detection_from_gradients(*features.gradients)
+                            results = (corner_detector.corners_from_response(image, response, threshold),
+                                       corner_detector.corner_detection_cv2(image, features.gray_cv2.data))
+                        elif op == "gamma":
+                            results = (gamma_correction.gamma_correction(image),
+                                       gamma_correction.gamma_correction_cv2(image))
+                        else:
+                            results = (features.gray, features.gray_cv2)
+
+                        manual_image, cv2_image = results
+                        pending.append(writer.submit(manual_image, self.manual_count_dir))
+                        pending.append(writer.submit(cv2_image, self.cv2_dir))
+                except Exception as e:
+                    logger.exception("Ошибка при обработке изображения")
+                finally:
+                    image.release()
+
+        saved = 0
+        for future in pending:
+            try:
+                logger.info("Сохранено: %s", future.result())
+                saved += 1
+            except Exception:
+                logger.exception("Ошибка при сохранении изображения")
+        logger.info("Сохранено файлов: %d из %d, запись: %s", saved, len(pending), writer.stats())
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+
+from lr5.core.api.cat_api import CatAPI
+from lr5.core.entity.image_cat import ImageCatFactory
+from lr5.core.service.worker_pool import WorkerPool
+from lr5.core.storage.image_storage import ImageStorage
+
+logger = logging.getLogger("my_logger")
+
+# Маркер конца потока в очередях между стадиями
+_DONE = None
+
+
+class StreamingPipeline:
+    """
+    Потоковая обработка изображений: загрузка -> обработка -> сохранение.
+
+    Стадии работают одновременно и связаны ограниченными очередями asyncio.Queue:
+    первые результаты пишутся на диск, пока остальные изображения ещё скачиваются,
+    а в памяти одновременно находится не больше изображений, чем помещается в очереди
+    и обрабатывается воркерами. До обработки изображения хранятся сжатыми: декодируются
+    перед отправкой в пул, и буфер освобождается сразу после неё.
+    """
+
+    def __init__(self, api: CatAPI, storage: ImageStorage, pool: WorkerPool, queue_size: int = 8,
+                 downloaders: int = 4, processors: Optional[int] = None, writers: int = 2):
+        """
+        queue_size: ёмкость каждой очереди между стадиями
+        downloaders: число одновременных загрузок
+        processors: число одновременных задач в пуле (по умолчанию — размер пула)
+        writers: число задач записи на диск
+        """
+        if min(queue_size, downloaders, writers) < 1 or (processors is not None and processors < 1):
+            raise ValueError("Размеры очередей и число задач стадий должны быть не меньше 1")
+        self.api = api
+        self.storage = storage
+        self.pool = pool
+        self.queue_size = queue_size
+        self.downloaders = downloaders
+        self.processors = processors or pool.size
+        self.writers = writers
+        self.saved = 0
+
+    async def run(self, limit: int, task: Callable[[tuple], tuple], task_args: tuple,
+                  originals_dir: Path, output_dir: Path) -> int:
+        """
+        Запускает конвейер.
+
+        Args:
+            limit: количество изображений
+            task: функция для пула процессов, принимает (idx, *task_args, data)
+                  и возвращает (idx, data, suffix) — как Convolution.run_convolution_task
+            task_args: дополнительные аргументы задачи (например, ядро)
+            originals_dir: каталог оригиналов
+            output_dir: каталог результатов
+
+        Returns:
+            Количество сохранённых файлов
+        """
+        self.saved = 0
+        items: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        downloaded: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        to_write: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        logger.info("Конвейер запущен: limit=%d, очередь=%d", limit, self.queue_size)
+
+        async with self.api.create_session() as session:
+            stages = [
+                [asyncio.create_task(self._list(session, limit, items))],
+                [asyncio.create_task(self._download(session, items, downloaded)) for _ in range(self.downloaders)],
+                [asyncio.create_task(self._process(downloaded, to_write, task, task_args, originals_dir, output_dir))
+                 for _ in range(self.processors)],
+                [asyncio.create_task(self._write(to_write)) for _ in range(self.writers)],
+            ]
+            outputs = [items, downloaded, to_write, None]
+            try:
+                # Стадии завершаются по очереди: когда все задачи стадии закончили,
+                # следующая получает по маркеру конца на каждую свою задачу
+                for tasks, output, consumers in zip(stages, outputs, stages[1:] + [[]]):
+                    await asyncio.gather(*tasks)
+                    for _ in consumers:
+                        await output.put(_DONE)
+            finally:
+                for task_ in (t for tasks in stages for t in tasks):
+                    task_.cancel()
+
+        logger.info("Конвейер завершён: сохранено файлов=%d", self.saved)
+        return self.saved
+
+    async def _list(self, session, limit: int, items: asyncio.Queue) -> None:
+        """Отдаёт метаданные по мере прихода страниц, загрузка начинается с первой страницы."""
+        index = 0
+        async for meta in self.api.iter_cats_async(session, limit):
+            index += 1
+            await items.put(CatAPI.index_image(index, meta))
+
+    async def _download(self, session, items: asyncio.Queue, downloaded: asyncio.Queue) -> None:
+        while True:
+            item = await items.get()
+            if item is _DONE:
+                return
+            try:
+                _, data = await self.api.fetch_image(session, item)
+            except Exception:
+                logger.exception("Ошибка загрузки изображения idx=%d id=%s", item["index"], item["id"])
+                continue
+            await downloaded.put((item, data))
+
+    async def _process(self, downloaded: asyncio.Queue, to_write: asyncio.Queue, task: Callable[[tuple], tuple],
+                       task_args: tuple, originals_dir: Path, output_dir: Path) -> None:
+        while True:
+            entry = await downloaded.get()
+            if entry is _DONE:
+                return
+            item, data = entry
+            try:
+                image = await asyncio.to_thread(self.api.build_image, item, data, True)
+                # Оригинал пишется из сжатых байтов, декодирование ему не нужно
+                await to_write.put((image, originals_dir, True))
+
+                # Декодированный буфер живёт только на время задачи в пуле
+                try:
+                    decode = asyncio.to_thread(getattr, image, "data")
+                    idx, out, suffix = await self.pool.run(task, (item["index"], *task_args, await decode))
+                finally:
+                    image.release()
+                out_image = ImageCatFactory.create_image_cat(
+                    index=image.index,
+                    filename=image.filename + suffix,
+                    extension=image.extension,
+                    data=out,
+                    url=image.url,
+                    breeds=image.breeds
+                )
+                await to_write.put((out_image, output_dir, False))
+            except Exception:
+                logger.exception("Ошибка обработки изображения idx=%d id=%s", item["index"], item["id"])
+
+    async def _write(self, to_write: asyncio.Queue) -> None:
+        while True:
+            entry = await to_write.get()
+            if entry is _DONE:
+                return
+            image, directory, original = entry
+            try:
+                if original:
+                    await self.storage.save_original_async(image, directory)
+                else:
+                    await self.storage.save_image_async(image, directory)
+                self.saved += 1
+            except Exception:
+                logger.exception("Ошибка сохранения изображения %s", image.filename)
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from lr5.core.image_operations.convolution import Convolution
+
+logger = logging.getLogger("my_logger")
+
+
+class WorkerPool:
+    """
+    Долгоживущий пул процессов для CatImageProcessor.
+
+    Процессы создаются при первой задаче и переиспользуются между вызовами,
+    поэтому запуск процессов и импорт cv2/scipy оплачиваются один раз.
+    Инициализатор воркера заранее строит объекты Convolution для переданных ядер.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, kernels: Optional[dict[str, np.ndarray]] = None):
+        """
+        max_workers: число процессов (по умолчанию — число ядер)
+        kernels: ядра свёртки, которые воркеры подготовят при старте
+        """
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("Число процессов должно быть не меньше 1")
+        self.max_workers = max_workers
+        self.kernels = kernels or {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def initialize_worker(kernels: dict[str, np.ndarray]) -> None:
+        """Инициализатор процесса: прогревает тяжёлые импорты и кэш ядер."""
+        import cv2  # noqa: F401
+        import scipy.ndimage  # noqa: F401
+        import scipy.signal  # noqa: F401
+
+        for kernel in kernels.values():
+            Convolution.cached(kernel)
+        logger.debug("Воркер готов: pid=%d, ядер=%d", os.getpid(), len(kernels))
+
+    @property
+    def size(self) -> int:
+        """Число процессов пула."""
+        return self.max_workers or os.cpu_count() or 1
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=WorkerPool.initialize_worker,
+                initargs=(self.kernels,)
+            )
+            logger.info("Пул процессов запущен: max_workers=%d", self.size)
+        return self._executor
+
+    def submit(self, func: Callable[..., Any], *args) -> Future:
+        return self.executor.submit(func, *args)
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Выполняет func(*args) в пуле, не блокируя цикл событий."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        except BrokenProcessPool:
+            # Упавший процесс ломает весь пул: следующая задача запустит новый
+            logger.exception("Пул процессов сломан, будет пересоздан")
+            self.shutdown(wait=False)
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+            logger.info("Пул процессов остановлен")
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
@@ -0,0 +1,215 @@
+import asyncio
+import io
+import logging
+import os
+import tarfile
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from lr5.core.codec.image_codec import ImageCodec
+from lr5.core.storage.image_storage import ImageStorage
+
+logger = logging.getLogger(__name__)
+
+
+class ImageArchive:
+    """
+    Архив изображений из tar-шардов ограниченного размера: shard-00000.tar, shard-00001.tar, ...
+
+    Новые изображения дописываются в последний шард; когда он превышает max_shard_bytes,
+    начинается следующий. Шарды — обычные несжатые tar-файлы, их можно читать стандартными
+    средствами. Индекс «имя -> (шард, смещение, размер)» строится по заголовкам tar при открытии
+    и пополняется при записи, поэтому чтение по имени — один seek без распаковки.
+    При повторной записи того же имени действует последняя версия.
+    """
+
+    SHARD_PATTERN = "shard-{:05d}.tar"
+
+    def __init__(self, root: Path, max_shard_bytes: int = 256 * 1024 * 1024):
+        """
+        root: каталог шардов
+        max_shard_bytes: размер, после которого начинается новый шард
+        """
+        if max_shard_bytes <= 0:
+            raise ValueError("Размер шарда должен быть положительным")
+        self.root = Path(root)
+        self.max_shard_bytes = max_shard_bytes
+        self._lock = threading.Lock()
+        self._tar: Optional[tarfile.TarFile] = None
+        self._index: dict[str, tuple[int, int, int]] = {}
+        self._shards = self._load_index()
+
+    def _shard_path(self, shard: int) -> Path:
+        return self.root / ImageArchive.SHARD_PATTERN.format(shard)
+
+    def _load_index(self) -> int:
+        """Читает заголовки существующих шардов, возвращает их число."""
+        shard = 0
+        while self._shard_path(shard).exists():
+            with tarfile.open(self._shard_path(shard), "r") as tar:
+                for member in tar:
+                    if member.isfile():
+                        self._index[member.name] = (shard, member.offset_data, member.size)
+            shard += 1
+        if shard:
+            logger.info("Архив открыт: %s, шардов=%d, изображений=%d", self.root, shard, len(self._index))
+        return shard
+
+    def add(self, name: str, data: bytes) -> Path:
+        """
+        Дописывает файл в архив.
+
+        Returns:
+            Путь к шарду, в который попал файл
+        """
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        with self._lock:
+            tar = self._current_tar()
+            tar.addfile(info, io.BytesIO(data))
+            # Данные должны быть видны читателям, открывающим шард отдельно
+            tar.fileobj.flush()
+            shard = self._shards - 1
+            # Данные лежат сразу за заголовком и дополнены нулями до целого числа блоков
+            blocks = -(-info.size // tarfile.BLOCKSIZE)
+            self._index[name] = (shard, tar.offset - blocks * tarfile.BLOCKSIZE, info.size)
+            if tar.offset >= self.max_shard_bytes:
+                self._close_tar()
+        return self._shard_path(shard)
+
+    def _current_tar(self) -> tarfile.TarFile:
+        """Открытый для записи шард (вызывается под блокировкой)."""
+        if self._tar is None:
+            last = self._shard_path(self._shards - 1) if self._shards else None
+            if last is not None and last.stat().st_size < self.max_shard_bytes:
+                self._tar = tarfile.open(last, "a")
+            else:
+                self.root.mkdir(parents=True, exist_ok=True)
+                self._tar = tarfile.open(self._shard_path(self._shards), "w")
+                self._shards += 1
+                logger.debug("Новый шард архива: %s", self._tar.name)
+        return self._tar
+
+    def _close_tar(self) -> None:
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
+
+    def read(self, name: str) -> bytes:
+        """
+        Байты файла по имени.
+
+        Raises:
+            FileNotFoundError: если такого имени в архиве нет
+        """
+        with self._lock:
+            if name not in self._index:
+                raise FileNotFoundError(f"Нет в архиве {self.root}: {name}")
+            shard, offset, size = self._index[name]
+        with open(self._shard_path(shard), "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def size(self, name: str) -> int:
+        with self._lock:
+            return self._index[name][2]
+
+    def __iter__(self) -> Iterator[tuple[str, bytes]]:
+        """Последовательно читает шарды и отдаёт (имя, байты); перезаписанные версии пропускаются."""
+        for shard in range(self._shards):
+            with tarfile.open(self._shard_path(shard), "r") as tar:
+                for member in tar:
+                    if not member.isfile() or self._index.get(member.name) != (
+                            shard, member.offset_data, member.size):
+                        continue
+                    yield member.name, tar.extractfile(member).read()
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return list(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def sync(self) -> None:
+        """Сбрасывает открытый шард на диск."""
+        with self._lock:
+            if self._tar is not None:
+                self._tar.fileobj.flush()
+                os.fsync(self._tar.fileobj.fileno())
+
+    def close(self) -> None:
+        """Дописывает конец архива в открытый шард. Запись после close откроет шард заново."""
+        with self._lock:
+            self._close_tar()
+
+    def __enter__(self) -> "ImageArchive":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class ArchiveStorage(ImageStorage):
+    """
+    ImageStorage, который пишет изображения не отдельными файлами, а в архив из шардов.
+
+    Каждый каталог сохранения (originals/, manual_count/, cv2/) — отдельный ImageArchive,
+    путь изображения dir/name.ext остаётся его адресом: load_image(dir / "img.jpg")
+    читает из архива каталога dir.
+    """
+
+    def __init__(self, photo_dir: Path, codec: Optional[ImageCodec] = None, executor=None,
+                 max_shard_bytes: int = 256 * 1024 * 1024):
+        """
+        max_shard_bytes: размер, после которого начинается новый шард
+        """
+        super().__init__(photo_dir, codec=codec, executor=executor)
+        self.max_shard_bytes = max_shard_bytes
+        self._archives: dict[Path, ImageArchive] = {}
+        self._archives_lock = threading.Lock()
+
+    def archive(self, directory: Path) -> ImageArchive:
+        """Архив каталога (открывается при первом обращении)."""
+        with self._archives_lock:
+            if directory not in self._archives:
+                self._archives[directory] = ImageArchive(directory, self.max_shard_bytes)
+            return self._archives[directory]
+
+    def iter_images(self, directory: Path, lazy: bool = False, scale: int = 1):
+        """Последовательно загружает все изображения архива каталога."""
+        for name, encoded in self.archive(directory):
+            yield self._build_image(directory / name, encoded, lazy, scale)
+
+    def _read_file(self, path: Path) -> bytes:
+        return self.archive(path.parent).read(path.name)
+
+    def _write_file(self, dest: Path, data: bytes) -> None:
+        self.archive(dest.parent).add(dest.name, data)
+
+    async def _write_file_async(self, dest: Path, data: bytes) -> None:
+        await asyncio.to_thread(self._write_file, dest, data)
+
+    def stored_size(self, path: Path) -> int:
+        return self.archive(path.parent).size(path.name)
+
+    def sync(self, path: Path) -> None:
+        self.archive(path.parent).sync()
+
+    def close(self) -> None:
+        """Закрывает все открытые шарды."""
+        with self._archives_lock:
+            for archive in self._archives.values():
+                archive.close()
+
+    def __enter__(self) -> "ArchiveStorage":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """
+    Локальный кэш загруженных изображений.
+
+    Байты лежат в objects/<xx>/<sha256(url)>, где xx — первые два символа хэша,
+    метаданные (размер, ETag, Last-Modified, время обращения) — в index.json.
+    Порядок записей в индексе — порядок последних обращений: при превышении max_bytes
+    удаляются самые давно использованные записи (LRU).
+
+    Запись свежая, пока не прошло max_age секунд (None — всегда свежая). Для устаревшей записи
+    validators() даёт заголовки условного запроса; ответ 304 продлевает запись через revalidate().
+
+    Изменения индекса копятся в памяти: index.json переписывается при вытеснении, после каждых
+    INDEX_SAVE_EVERY записей и в flush()/close(). Файлы, записанные после последнего сохранения
+    индекса, при аварийном завершении остаются на диске без записи в индексе и не учитываются
+    в max_bytes до clear().
+    """
+
+    INDEX_NAME = "index.json"
+    # Число записей put(), после которого индекс сохраняется без вытеснения
+    INDEX_SAVE_EVERY = 32
+
+    def __init__(self, root: Path, max_bytes: int = 512 * 1024 * 1024, max_age: Optional[float] = None):
+        """
+        root: каталог кэша
+        max_bytes: максимальный суммарный размер файлов изображений
+        max_age: время свежести записи, с (None — без повторной проверки)
+        """
+        if max_bytes <= 0:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Есть изменения индекса (записи, обращения, продления), ещё не сохранённые в index.json
+        self._dirty = False
+        self._unsaved_puts = 0
+        self._entries: OrderedDict[str, dict] = self._load_index()
+        self.total_bytes = sum(entry["size"] for entry in self._entries.values())
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _object_path(self, key: str) -> Path:
+        return self.root / "objects" / key[:2] / key
+
+    def get(self, url: str) -> Optional[bytes]:
+        """Байты свежей записи или None (нет записи, запись устарела или файл пропал)."""
+        with self._lock:
+            entry = self._entries.get(self.key(url))
+            if entry is None or not self._is_fresh(entry):
+                return None
+            return self._read(self.key(url))
+
+    def validators(self, url: str) -> dict[str, str]:
+        """Заголовки условного запроса для записи (пусто, если записи нет)."""
+        with self._lock:
+            entry = self._entries.get(self.key(url))
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidate(self, url: str) -> Optional[bytes]:
+        """Сервер ответил 304: запись снова свежая. Возвращает её байты или None, если запись пропала."""
+        with self._lock:
+            key = self.key(url)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["stored"] = time.time()
+            self._dirty = True
+            return self._read(key)
+
+    def put(self, url: str, data: bytes, headers: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Сохраняет байты изображения.
+
+        Args:
+            url: URL изображения (ключ кэша)
+            data: сжатые байты
+            headers: заголовки ответа, из них берутся ETag и Last-Modified
+        """
+        headers = headers or {}
+        key = self.key(url)
+        path = self._object_path(key)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old["size"]
+            now = time.time()
+            self._entries[key] = {
+                "url": url,
+                "size": len(data),
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "stored": now,
+                "accessed": now,
+            }
+            self.total_bytes += len(data)
+            self._dirty = True
+            self._unsaved_puts += 1
+            if self._evict() or self._unsaved_puts >= ImageCache.INDEX_SAVE_EVERY:
+                self._save_index()
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+            self._save_index()
+
+    def flush(self) -> None:
+        """Сохраняет накопленные записи, обращения и продления в index.json."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ImageCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, url: str) -> bool:
+        return self.key(url) in self._entries
+
+    def _is_fresh(self, entry: dict) -> bool:
+        return self.max_age is None or time.time() - entry["stored"] < self.max_age
+
+    def _read(self, key: str) -> Optional[bytes]:
+        """Читает файл записи и отмечает обращение (вызывается под блокировкой)."""
+        try:
+            data = self._object_path(key).read_bytes()
+        except FileNotFoundError:
+            logger.warning("Файл записи кэша пропал: %s", key)
+            self._remove(key)
+            self._save_index()
+            return None
+        self._entries[key]["accessed"] = time.time()
+        self._entries.move_to_end(key)
+        self._dirty = True
+        return data
+
+    def _evict(self) -> bool:
+        """Удаляет давно использованные записи, пока кэш больше max_bytes. Возвращает, было ли вытеснение."""
+        evicted = False
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            logger.debug("Вытеснение из кэша: %s", self._entries[key]["url"])
+            self._remove(key)
+            evicted = True
+        return evicted
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry["size"]
+        self._object_path(key).unlink(missing_ok=True)
+
+    def _load_index(self) -> OrderedDict:
+        path = self.root / ImageCache.INDEX_NAME
+        if not path.exists():
+            return OrderedDict()
+        try:
+            entries = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.exception("Индекс кэша повреждён, кэш будет пересобран: %s", path)
+            return OrderedDict()
+        # Порядок в файле — порядок обращений, но на всякий случай сортируем по времени
+        return OrderedDict(sorted(entries.items(), key=lambda item: item[1]["accessed"]))
+
+    def _save_index(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / ImageCache.INDEX_NAME
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+        os.replace(tmp_path, path)
+        self._dirty = False
+        self._unsaved_puts = 0
@@ -1,52 +1,127 @@
+import asyncio
 import logging
-from io import BytesIO
+import os
+from concurrent.futures import Executor
 from pathlib import Path
+from typing import Optional
 
 import aiofiles
-import numpy as np
-from PIL import Image as PILImage
 
 from lr5.config import IMAGE_EXTENSIONS
+from lr5.core.codec.image_codec import ImageCodec, PILCodec
 from lr5.core.entity.image_cat import ImageCatFactory
+from lr5.core.entity.lazy_image_cat import LazyImageCatFactory
+from lr5.core.storage.image_writer import ImageWriter
 
 logger = logging.getLogger(__name__)
 
 
 class ImageStorage:
-    def __init__(self, photo_dir: Path):
+    def __init__(self, photo_dir: Path, codec: Optional[ImageCodec] = None, executor: Optional[Executor] = None):
         """
         Инициализация хранилища изображений
 
         Args:
             photo_dir: Базовый каталог для изображений
+            codec: кодек для чтения и записи изображений (по умолчанию PILCodec)
+            executor: пул, в котором save_image_async кодирует изображения
+                      (None — пул потоков цикла событий; ProcessPoolExecutor — кодирование в процессах)
         """
 
         self.photo_dir = photo_dir
+        self.codec = codec or PILCodec()
+        self.executor = executor
         self.image_extensions = IMAGE_EXTENSIONS
-        self.photo_dir.mkdir(parents=True, exist_ok=True)
+        # Уже созданные каталоги: mkdir не повторяется на каждое сохранение
+        self._created_dirs: set[Path] = set()
+        self._ensure_dir(self.photo_dir)
+
+    def _ensure_dir(self, directory: Path) -> None:
+        if directory not in self._created_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._created_dirs.add(directory)
+
+    def _read_file(self, path: Path) -> bytes:
+        if not path.exists():
+            raise FileNotFoundError(f"Файл не найден: {path}")
+        return path.read_bytes()
+
+    def _write_file(self, dest: Path, data: bytes) -> None:
+        dest.write_bytes(data)
+
+    async def _write_file_async(self, dest: Path, data: bytes) -> None:
+        async with aiofiles.open(dest, "wb") as f:
+            await f.write(data)
+
+    def stored_size(self, path: Path) -> int:
+        """Размер сохранённого изображения в байтах."""
+        return path.stat().st_size
+
+    def sync(self, path: Path) -> None:
+        """Сбрасывает сохранённое изображение на диск (os.fsync)."""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self) -> None:
+        """Освобождает ресурсы хранилища (у файлового хранилища их нет)."""
+
+    def writer(self, workers: int = 2, queue_size: int = 64, fsync: bool = False) -> ImageWriter:
+        """
+        Режим фоновой записи: очередь и пул потоков, сохранения возвращают Future (см. ImageWriter).
+
+        Args:
+            workers: число потоков записи
+            queue_size: ёмкость очереди
+            fsync: сбрасывать каждый файл на диск
+        """
+        return ImageWriter(self, workers=workers, queue_size=queue_size, fsync=fsync)
 
     def _check_extension(self, path: Path) -> None:
         if path.suffix.lower() not in self.image_extensions:
             logger.error(f"Неподдерживаемый формат изображения: {path.suffix}")
             raise ValueError(f"Неподдерживаемый формат изображения: {path.suffix}")
 
-    def load_image(self, image_path: Path):
+    def load_image(self, image_path: Path, lazy: bool = False, scale: int = 1):
         """
         Загрузить изображение и вернуть Image(filename, extension, data: np.ndarray).
 
+        Args:
+            image_path: путь к файлу
+            lazy: если True — прочитать только байты файла, декодирование отложить до обращения к data
+            scale: уменьшение при декодировании (1, 2, 4 или 8), для JPEG — средствами libjpeg
+
         Raises:
             FileNotFoundError: если файл не найден.
             ValueError: если расширение не поддерживается или изображение не удалось прочитать.
         """
-        if not image_path.exists():
-            raise FileNotFoundError(f"Файл не найден: {image_path}")
-
         self._check_extension(image_path)
+        return self._build_image(image_path, self._read_file(image_path), lazy, scale)
+
+    def _build_image(self, image_path: Path, encoded: bytes, lazy: bool = False, scale: int = 1):
+        """Image из сжатых байтов файла image_path (см. load_image)."""
+        if lazy:
+            try:
+                image = LazyImageCatFactory.create_image_cat(
+                    index=0,
+                    filename=image_path.stem,
+                    extension=image_path.suffix.lower(),
+                    encoded=encoded,
+                    scale=scale,
+                    codec=self.codec,
+                    url=None,
+                    breeds=[]
+                )
+            except Exception as exc:
+                logger.exception("Ошибка при загрузке изображения %s", image_path)
+                raise ValueError(f"Не удалось загрузить изображение: {image_path}") from exc
+            logger.info("Изображение загружено (lazy): %s", image_path.name)
+            return image
 
         try:
-            with PILImage.open(image_path) as pil_img:
-                pil_img.load()  # гарантировать чтение файла
-                arr = np.asarray(pil_img)  # HxW или HxWxC
+            arr = self.codec.decode(encoded, scale)  # HxW или HxWxC
         except Exception as exc:
             logger.exception("Ошибка при загрузке изображения %s", image_path)
             raise ValueError(f"Не удалось загрузить изображение: {image_path}") from exc
@@ -84,11 +159,10 @@ class ImageStorage:
         except ValueError as exc:
             raise exc
 
-        save_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(save_dir)
 
         try:
-            pil = PILImage.fromarray(image.data)
-            pil.save(dest)
+            self._write_file(dest, self.codec.encode(image.data, image.extension))
         except Exception as exc:
             logger.exception("Ошибка при сохранении изображения %s", dest)
             raise ValueError(f"Не удалось сохранить изображение: {dest}") from exc
@@ -96,6 +170,58 @@ class ImageStorage:
         logger.info("Изображение сохранено: %s", dest)
         return dest
 
+    def save_original(self, image, output: Path = None) -> Path:
+        """
+        Сохранить оригинал: исходные сжатые байты (image.encoded) пишутся на диск как есть,
+        без декодирования и повторного кодирования. Если байтов нет — как save_image.
+
+        Args:
+            image: экземпляр Image (filename, extension, data, encoded)
+            output: путь до папки сохранения (если не указан, используется photo_dir)
+
+        Returns:
+            Path: полный путь к сохранённому файлу.
+        """
+        if getattr(image, "encoded", None) is None:
+            return self.save_image(image, output)
+
+        save_dir = output if output else self.photo_dir
+        dest = save_dir / (image.filename + image.extension)
+
+        self._check_extension(dest)
+        self._ensure_dir(save_dir)
+
+        try:
+            self._write_file(dest, image.encoded)
+        except Exception as exc:
+            logger.exception("Ошибка при сохранении оригинала %s", dest)
+            raise ValueError(f"Не удалось сохранить изображение: {dest}") from exc
+
+        logger.info("Оригинал сохранён без перекодирования: %s", dest)
+        return dest
+
+    async def save_original_async(self, image, output: Path = None) -> Path:
+        """
+        Асинхронно сохранить оригинал без перекодирования (см. save_original).
+        """
+        if getattr(image, "encoded", None) is None:
+            return await self.save_image_async(image, output)
+
+        save_dir = output if output else self.photo_dir
+        dest = save_dir / (image.filename + image.extension)
+
+        self._check_extension(dest)
+        self._ensure_dir(save_dir)
+
+        try:
+            await self._write_file_async(dest, image.encoded)
+        except Exception as exc:
+            logger.exception("Ошибка при асинхронном сохранении оригинала %s", dest)
+            raise ValueError(f"Не удалось сохранить изображение: {dest}") from exc
+
+        logger.info("Асинхронно сохранён оригинал без перекодирования: %s", dest)
+        return dest
+
     async def save_image_async(self, image, output: Path = None) -> Path:
         """
         Асинхронно сохранить numpy-изображение в файл.
@@ -112,22 +238,15 @@ class ImageStorage:
         dest = save_dir / (image.filename + image.extension)
 
         self._check_extension(dest)
-        save_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(save_dir)
 
         try:
-            buf = BytesIO()
-            ext = (image.extension or "").lower().lstrip(".")
-            format_map = {
-                "jpg": "JPEG",
-                "jpeg": "JPEG",
-                "png": "PNG",
-            }
-            pil_format = format_map.get(ext, None)
-            logger.debug("Начало асинхронного сохранения: dest=%s, format=%s", dest, pil_format)
-            PILImage.fromarray(image.data).save(buf, format=pil_format)
-            data_bytes = buf.getvalue()
-            async with aiofiles.open(dest, "wb") as f:
-                await f.write(data_bytes)
+            logger.debug("Начало асинхронного сохранения: dest=%s, codec=%s", dest, self.codec.name)
+            # Кодирование — самая дорогая часть сохранения, поэтому оно идёт вне цикла событий:
+            # несколько сохранений из gather кодируются параллельно
+            loop = asyncio.get_running_loop()
+            data_bytes = await loop.run_in_executor(self.executor, self.codec.encode, image.data, image.extension)
+            await self._write_file_async(dest, data_bytes)
             logger.info("Асинхронно сохранено изображение: %s", dest)
         except Exception as exc:
             logger.exception("Ошибка при асинхронном сохранении изображения %s", dest)
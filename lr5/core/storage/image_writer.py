@@ -0,0 +1,144 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Маркер остановки потока записи
+_STOP = None
+
+
+class ImageWriter:
+    """
+    Фоновая запись изображений для ImageStorage.
+
+    submit() кладёт изображение в ограниченную очередь и сразу возвращает Future с путём к файлу;
+    кодирование и запись выполняют workers потоков. Если очередь заполнена, submit() ждёт —
+    так обработка не уходит далеко вперёд диска и не копит изображения в памяти.
+    flush() дожидается записи всего отправленного, close() дополнительно останавливает потоки.
+    """
+
+    def __init__(self, storage, workers: int = 2, queue_size: int = 64, fsync: bool = False):
+        """
+        storage: ImageStorage, через который пишутся файлы
+        workers: число потоков записи
+        queue_size: ёмкость очереди (ожидающих записи изображений)
+        fsync: сбрасывать каждый файл на диск (os.fsync) до завершения Future
+        """
+        if workers < 1 or queue_size < 1:
+            raise ValueError("Число потоков и размер очереди должны быть не меньше 1")
+        self.storage = storage
+        self.fsync = fsync
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self._started = time.perf_counter()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"image-writer-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Фоновая запись запущена: потоков=%d, очередь=%d", workers, queue_size)
+
+    def submit(self, image, output: Optional[Path] = None, original: bool = False) -> Future:
+        """
+        Поставить изображение в очередь на запись.
+
+        Args:
+            image: экземпляр Image
+            output: папка сохранения (по умолчанию photo_dir хранилища)
+            original: сохранить исходные байты без перекодирования (см. ImageStorage.save_original)
+
+        Returns:
+            Future с путём к сохранённому файлу (или с исключением записи)
+        """
+        if self._closed:
+            raise RuntimeError("Запись уже остановлена")
+        future: Future = Future()
+        self._queue.put((future, image, output, original))
+        return future
+
+    @property
+    def queue_depth(self) -> int:
+        """Число изображений, ожидающих записи."""
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        """Счётчики записи и пропускная способность с момента запуска."""
+        elapsed = time.perf_counter() - self._started
+        with self._stats_lock:
+            written, failed, size = self.written, self.failed, self.bytes_written
+        return {
+            "queue_depth": self.queue_depth,
+            "written": written,
+            "failed": failed,
+            "bytes": size,
+            "elapsed": elapsed,
+            "images_per_sec": written / elapsed if elapsed > 0 else 0.0,
+            "mb_per_sec": size / elapsed / 2 ** 20 if elapsed > 0 else 0.0,
+        }
+
+    def flush(self) -> None:
+        """Ждёт, пока будут записаны все отправленные изображения."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Записывает оставшееся и останавливает потоки. Повторный вызов ничего не делает."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        stats = self.stats()
+        logger.info("Фоновая запись остановлена: записано=%d, ошибок=%d, %.1f изобр./с, %.2f МБ/с",
+                    stats["written"], stats["failed"], stats["images_per_sec"], stats["mb_per_sec"])
+
+    def __enter__(self) -> "ImageWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _work(self) -> None:
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is _STOP:
+                    return
+                future, image, output, original = entry
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    path = self._write(image, output, original)
+                except Exception as exc:
+                    with self._stats_lock:
+                        self.failed += 1
+                    future.set_exception(exc)
+                else:
+                    future.set_result(path)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, image, output: Optional[Path], original: bool) -> Path:
+        if original:
+            path = self.storage.save_original(image, output)
+        else:
+            path = self.storage.save_image(image, output)
+        if self.fsync:
+            self.storage.sync(path)
+        size = self.storage.stored_size(path)
+        with self._stats_lock:
+            self.written += 1
+            self.bytes_written += size
+        return path
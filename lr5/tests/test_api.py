@@ -1,11 +1,15 @@
+import asyncio
 import io
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
 
 import numpy as np
+from aiohttp import web
 from PIL import Image as PILImage
 
 from lr5.core.api.cat_api import CatAPI
+from lr5.core.api.retry_policy import RetryPolicy
 
 
 class TestCatAPI(unittest.TestCase):
@@ -37,6 +41,239 @@ class TestCatAPI(unittest.TestCase):
         self.assertEqual(len(images), 1)
         self.assertEqual(images[0].filename, "abc")
         self.assertEqual(images[0].extension, ".jpg")
+        self.assertEqual(images[0].data.shape, (4, 4, 3))
+        # Декодированное изображение не держит рядом сжатые байты
+        self.assertIsNone(images[0].encoded)
+
+        mock_get.side_effect = [resp_meta, resp_img]
+        lazy = self.api.get_cat_images(limit=1, lazy=True)[0]
+        self.assertEqual(lazy.encoded, buf.getvalue())
+        self.assertFalse(lazy.is_decoded)
+        self.assertEqual(lazy.data.shape, (4, 4, 3))
+        lazy.release()
+        self.assertFalse(lazy.is_decoded)
+
+    def test_get_cats_paginates_and_deduplicates(self):
+        """Тест: метаданные набираются с нескольких страниц, повторы id отбрасываются."""
+        def page(n):
+            # Соседние страницы пересекаются наполовину
+            start = n * CatAPI.PAGE_SIZE // 2
+            return [{"id": f"id{i}", "url": f"http://x/{i}.jpg"} for i in range(start, start + CatAPI.PAGE_SIZE)]
+
+        with patch.object(CatAPI, "_get_page", side_effect=page) as get_page:
+            cats = self.api.get_cats(limit=60)
+        ids = [meta["id"] for meta in cats]
+        self.assertEqual(len(ids), 60)
+        self.assertEqual(len(set(ids)), 60)
+        self.assertGreater(get_page.call_count, 3)
+
+        async def page_async(session, n):
+            return page(n)
+
+        with patch.object(CatAPI, "_get_page_async", side_effect=page_async):
+            async def collect():
+                return [meta["id"] async for meta in self.api.iter_cats_async(None, limit=40)]
+            async_ids = asyncio.run(collect())
+        self.assertEqual(len(async_ids), 40)
+        self.assertEqual(len(set(async_ids)), 40)
+
+    def test_get_cats_stops_without_new_ids(self):
+        """Тест: если страницы не дают новых id, возвращается то, что удалось набрать."""
+        meta = [{"id": "same", "url": "http://x/1.jpg"}]
+        with patch.object(CatAPI, "_get_page", return_value=meta) as get_page:
+            self.assertEqual(self.api.get_cats(limit=30), meta)
+        self.assertLess(get_page.call_count, CatAPI.MAX_PAGE_ROUNDS * 2)
+
+    def test_get_cats_uses_session_per_thread(self):
+        """Тест: одновременные запросы страниц идут через разные сессии, у каждого потока своя."""
+        api = CatAPI(api_key="key")
+        barrier = threading.Barrier(2, timeout=5)
+        calls = []
+
+        def get(session, url, params=None, **kwargs):
+            barrier.wait()  # обе страницы запрашиваются одновременно
+            calls.append((threading.get_ident(), session))
+            start = params["page"] * CatAPI.PAGE_SIZE
+            response = MagicMock()
+            response.json.return_value = [{"id": f"id{i}"} for i in range(start, start + CatAPI.PAGE_SIZE)]
+            return response
+
+        with patch("requests.Session.get", autospec=True, side_effect=get):
+            self.assertEqual(len(api.get_cats(limit=2 * CatAPI.PAGE_SIZE)), 2 * CatAPI.PAGE_SIZE)
+
+        sessions = {thread: session for thread, session in calls}
+        self.assertEqual(len(sessions), 2)
+        self.assertEqual(len({id(session) for session in sessions.values()}), 2)
+        self.assertTrue(all(session.headers["x-api-key"] == "key" for session in sessions.values()))
+        self.assertIs(api.session, api.session)
+        self.assertNotIn(api.session, sessions.values())
+
+
+def encode_jpeg(seed: int = 0) -> bytes:
+    arr = np.random.default_rng(seed).integers(0, 256, (4, 4, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    PILImage.fromarray(arr).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+class LocalServer:
+    """Локальный HTTP-сервер aiohttp для асинхронных тестов CatAPI."""
+
+    def __init__(self, routes: list):
+        self.app = web.Application()
+        self.app.add_routes(routes)
+        self.runner = web.AppRunner(self.app)
+
+    async def __aenter__(self) -> "LocalServer":
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.runner.cleanup()
+
+
+class TestCatAPIAsync(unittest.TestCase):
+    def test_concurrency_limit_and_timeout(self):
+        """Тест: число одновременных соединений ограничено, медленный запрос прерывается по таймауту."""
+        state = {"active": 0, "peak": 0}
+        payload = encode_jpeg()
+
+        async def image(request):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.05)
+            state["active"] -= 1
+            return web.Response(body=payload)
+
+        async def slow(request):
+            await asyncio.sleep(1.0)
+            return web.Response(body=payload)
+
+        async def scenario():
+            api = CatAPI(api_key=None, max_concurrency=2, request_timeout=0.3,
+                         retry_policy=RetryPolicy(max_attempts=1))
+            async with LocalServer([web.get("/img/{n}", image), web.get("/slow", slow)]) as server:
+                async with api.create_session() as session:
+                    items = [{"index": i, "url": f"{server.url}/img/{i}"} for i in range(1, 7)]
+                    results = await asyncio.gather(*[api.fetch_image(session, item) for item in items])
+                    self.assertEqual([idx for idx, _ in results], list(range(1, 7)))
+
+                    with self.assertRaises(asyncio.TimeoutError):
+                        await api.fetch_image(session, {"index": 7, "url": f"{server.url}/slow"})
+
+        asyncio.run(scenario())
+        self.assertEqual(state["peak"], 2)
+
+    def test_get_cat_images_async_without_blocking_calls(self):
+        """Тест: метаданные и изображения запрашиваются через одну aiohttp-сессию, без requests."""
+        payloads = {f"c{i}": encode_jpeg(i) for i in range(3)}
+        connections = set()
+
+        async def search(request):
+            self.assertEqual(request.query["limit"], str(CatAPI.PAGE_SIZE))
+            base = str(request.url.origin())
+            return web.json_response([{"id": key, "url": f"{base}/img/{key}.jpg"} for key in payloads])
+
+        async def image(request):
+            connections.add(request.transport)
+            return web.Response(body=payloads[request.match_info["key"]])
+
+        async def scenario():
+            async with LocalServer([web.get("/search", search), web.get("/img/{key}.jpg", image)]) as server:
+                api = CatAPI(api_key=None, max_concurrency=1)
+                api.base_url = f"{server.url}/search"
+                return await api.get_cat_images_async(limit=3, lazy=True)
+
+        with patch("requests.Session.get", side_effect=AssertionError("блокирующий запрос")):
+            images = asyncio.run(scenario())
+        self.assertEqual([image.filename for image in images], ["c0", "c1", "c2"])
+        self.assertEqual([image.encoded for image in images], list(payloads.values()))
+        self.assertFalse(any(image.is_decoded for image in images))
+        # max_concurrency=1 и keep-alive: все запросы идут через одно соединение
+        self.assertEqual(len(connections), 1)
+
+    def test_retry_and_failure_isolation(self):
+        """Тест: временные ошибки повторяются с учётом Retry-After, постоянные не ломают весь набор."""
+        payload = encode_jpeg()
+        attempts = {"flaky": 0}
+
+        async def search(request):
+            base = str(request.url.origin())
+            return web.json_response([{"id": key, "url": f"{base}/img/{key}.jpg"}
+                                      for key in ("ok", "flaky", "missing")])
+
+        async def image(request):
+            key = request.match_info["key"]
+            if key == "missing":
+                return web.Response(status=404)
+            if key == "flaky":
+                attempts["flaky"] += 1
+                if attempts["flaky"] < 3:
+                    return web.Response(status=503, headers={"Retry-After": "0"})
+            return web.Response(body=payload)
+
+        async def scenario():
+            async with LocalServer([web.get("/search", search), web.get("/img/{key}.jpg", image)]) as server:
+                api = CatAPI(api_key=None, retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01))
+                api.base_url = f"{server.url}/search"
+                return api, await api.get_cat_images_async(limit=3)
+
+        api, images = asyncio.run(scenario())
+        self.assertEqual([image.filename for image in images], ["ok", "flaky"])
+        self.assertEqual(attempts["flaky"], 3)
+        self.assertEqual([item["id"] for item in api.failed], ["missing"])
+        self.assertEqual(api.failed[0]["error"].status, 404)
+
+    def test_decoding_runs_off_loop(self):
+        """Тест: декодирование идёт вне потока цикла событий, битое изображение не ломает порядок."""
+        payloads = {"a": encode_jpeg(1), "broken": b"not an image", "c": encode_jpeg(2)}
+        threads = set()
+        build_image = CatAPI.build_image
+
+        def tracking_build(api, *args):
+            threads.add(threading.get_ident())
+            return build_image(api, *args)
+
+        async def search(request):
+            base = str(request.url.origin())
+            return web.json_response([{"id": key, "url": f"{base}/img/{key}.jpg"} for key in payloads])
+
+        async def image(request):
+            return web.Response(body=payloads[request.match_info["key"]])
+
+        async def scenario():
+            async with LocalServer([web.get("/search", search), web.get("/img/{key}.jpg", image)]) as server:
+                api = CatAPI(api_key=None)
+                api.base_url = f"{server.url}/search"
+                return api, await api.get_cat_images_async(limit=3)
+
+        with patch.object(CatAPI, "build_image", tracking_build):
+            api, images = asyncio.run(scenario())
+        self.assertEqual([(image.index, image.filename) for image in images], [(1, "a"), (3, "c")])
+        self.assertEqual([item["id"] for item in api.failed], ["broken"])
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_retry_delays(self):
+        """Тест расчёта задержек: экспонента с потолком, разброс и Retry-After."""
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=False)
+        self.assertEqual([policy.delay(attempt) for attempt in range(1, 5)], [1.0, 2.0, 4.0, 5.0])
+        self.assertEqual(policy.delay(1, retry_after="3"), 3.0)
+        self.assertEqual(policy.delay(1, retry_after="120"), 5.0)
+        self.assertEqual(policy.delay(1, retry_after="Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+        jittered = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        self.assertTrue(all(0.0 <= jittered.delay(3) <= 4.0 for _ in range(20)))
+
+    def test_invalid_settings(self):
+        """Тест ошибок при некорректных настройках соединений."""
+        with self.assertRaises(ValueError):
+            CatAPI(max_concurrency=0)
+        with self.assertRaises(ValueError):
+            CatAPI(request_timeout=0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+import asyncio
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+from PIL import Image as PILImage
+
+from lr5.core.api.cat_api import CatAPI
+from lr5.core.entity.image_cat import ImageCatFactory
+from lr5.core.image_operations.edge_detection import EdgeDetection
+from lr5.core.image_operations.gamma_correction import GammaCorrection
+from lr5.core.service.cat_image_processor import CatImageProcessor
+from lr5.core.storage.image_storage import ImageStorage
+
+
+class TestCatImageProcessorAsync(unittest.TestCase):
+    def setUp(self):
+        """Процессор с временными каталогами и набором изображений разных форм."""
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.processor = CatImageProcessor(api_key="key", workers=1)
+        self.addCleanup(self.processor.shutdown)
+        self.processor.storage = ImageStorage(self.tmpdir)
+        self.processor.originals_dir = self.tmpdir / "originals"
+        self.processor.manual_count_dir = self.tmpdir / "manual_count"
+        self.processor.cv2_dir = self.tmpdir / "cv2"
+
+        rng = np.random.default_rng(0)
+        self.images = [
+            ImageCatFactory.create_image_cat(
+                index=i, filename=f"cat{i}", extension=".png",
+                data=rng.integers(0, 256, shape, dtype=np.uint8), url=None, breeds=[]
+            )
+            for i, shape in enumerate([(16, 20, 3), (12, 9, 3), (10, 10, 3)], start=1)
+        ]
+
+    def run_async(self, coro_factory):
+        with patch.object(CatAPI, "get_cat_images_async", AsyncMock(return_value=self.images)):
+            asyncio.run(coro_factory())
+
+    def read(self, directory: str, name: str) -> np.ndarray:
+        return np.asarray(PILImage.open(self.tmpdir / directory / name))
+
+    def test_edges_async_matches_sync(self):
+        """Тест: асинхронные границы совпадают с синхронными и сохраняются под своими именами."""
+        self.run_async(lambda: self.processor.process_images_with_edges_async(limit=3))
+
+        detector = EdgeDetection()
+        for image in self.images:
+            np.testing.assert_array_equal(self.read("manual_count", f"{image.filename}_edge.png"),
+                                          detector.edge_detection(image).data)
+            self.assertTrue((self.tmpdir / "cv2" / f"{image.filename}_edge_cv2.png").exists())
+        self.assertEqual(len(list((self.tmpdir / "originals").iterdir())), 3)
+
+    def test_gamma_and_grayscale_async(self):
+        """Тест асинхронной гамма-коррекции и преобразования в grayscale."""
+        self.run_async(lambda: self.processor.process_images_with_gamma_correction_async(gamma=2.0, limit=3))
+        self.run_async(lambda: self.processor.process_images_with_grayscale_async(limit=3))
+
+        correction = GammaCorrection(2.0)
+        for image in self.images:
+            np.testing.assert_array_equal(self.read("manual_count", f"{image.filename}_gamma2.0.png"),
+                                          correction.gamma_correction(image).data)
+            self.assertEqual(self.read("cv2", f"{image.filename}_gray_cv2.png").shape, image.data.shape[:2])
+
+        with self.assertRaises(ValueError):
+            asyncio.run(self.processor.process_images_with_gamma_correction_async(gamma=0))
+
+    def test_async_paths_decode_lazily_and_release(self):
+        """Тест: декодированных изображений не больше, чем процессов в пуле, буферы освобождаются."""
+        api = self.processor.api
+        payloads = []
+        for image in self.images:
+            buf = io.BytesIO()
+            PILImage.fromarray(image.data).save(buf, format="PNG")
+            payloads.append(buf.getvalue())
+        self.images = [
+            api.build_image(CatAPI.index_image(image.index, {"id": image.filename, "url": f"x/{image.filename}.png"}),
+                            payload, lazy=True)
+            for image, payload in zip(self.images, payloads)
+        ]
+
+        decoded_at_once = []
+        decode = api.codec.decode
+
+        def counting_decode(encoded, scale=1):
+            decoded_at_once.append(sum(image.is_decoded for image in self.images) + 1)
+            return decode(encoded, scale)
+
+        with patch.object(api.codec, "decode", side_effect=counting_decode):
+            self.run_async(lambda: self.processor.process_images_with_edges_async(limit=3))
+            self.run_async(lambda: self.processor.process_images_with_convolution_async(limit=3))
+
+        self.assertEqual(len(decoded_at_once), 6)
+        self.assertLessEqual(max(decoded_at_once), self.processor.pool.size)
+        self.assertFalse(any(image.is_decoded for image in self.images))
+        self.assertEqual([(self.tmpdir / "originals" / f"cat{i}.png").read_bytes() for i in (1, 2, 3)], payloads)
+        self.assertEqual(len(list((self.tmpdir / "manual_count").iterdir())), 6)
+        self.assertEqual(len(list((self.tmpdir / "cv2").iterdir())), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from lr5.core.codec.benchmark import sample_image
+from lr5.core.api.cat_api import CatAPI
+from lr5.core.codec.image_codec import AutoCodec, ImageCodec, OpenCVCodec, PILCodec, create_codec, sniff_format
+from lr5.core.entity.image_cat import ImageCatFactory
+from lr5.core.storage.image_storage import ImageStorage
+
+
+class TestImageCodec(unittest.TestCase):
+    def setUp(self):
+        self.pil = PILCodec()
+        self.cv2 = OpenCVCodec()
+        self.rgb = sample_image(48, 64)
+
+    def test_png_roundtrip_matches_between_backends(self):
+        """Тест: PNG без потерь, бэкенды дают одинаковые RGB/RGBA/grayscale массивы."""
+        rgba = np.dstack([self.rgb, np.full(self.rgb.shape[:2], 200, dtype=np.uint8)])
+        for data in (self.rgb, self.rgb[..., 0].copy(), rgba):
+            for encoder in (self.pil, self.cv2):
+                encoded = encoder.encode(data, ".png")
+                self.assertEqual(sniff_format(encoded), "png")
+                for decoder in (self.pil, self.cv2):
+                    np.testing.assert_array_equal(decoder.decode(encoded), data)
+
+    def test_jpeg_channel_order_and_scale(self):
+        """Тест: JPEG из OpenCV в порядке RGB, уменьшенное декодирование даёт те же размеры."""
+        encoded = self.cv2.encode(self.rgb, ".jpg")
+        self.assertEqual(sniff_format(encoded), "jpg")
+        pil_data, cv2_data = self.pil.decode(encoded), self.cv2.decode(encoded)
+        self.assertLess(np.abs(pil_data.astype(int) - cv2_data.astype(int)).mean(), 2.0)
+        self.assertLess(np.abs(cv2_data.astype(int) - self.rgb.astype(int)).mean(), 8.0)
+
+        for scale in (2, 4, 8):
+            self.assertEqual(self.cv2.decode(encoded, scale).shape, self.pil.decode(encoded, scale).shape)
+        gray = self.cv2.encode(self.rgb[..., 1].copy(), ".jpg")
+        self.assertEqual(self.cv2.decode(gray, 2).shape, (24, 32))
+
+    def test_auto_codec_and_storage(self):
+        """Тест: auto выбирает бэкенд для каждой пары (операция, формат), хранилище работает через кодек."""
+        auto = AutoCodec()
+        self.assertEqual(set(auto.choice), {(op, fmt) for op in ("encode", "decode") for fmt in ("jpg", "png")})
+
+        storage = ImageStorage(Path(tempfile.mkdtemp()), codec=auto)
+        image = ImageCatFactory.create_image_cat(
+            index=1, filename="cat", extension=".png", data=self.rgb, url=None, breeds=[]
+        )
+        path = storage.save_image(image)
+        np.testing.assert_array_equal(storage.load_image(path).data, self.rgb)
+
+        with self.assertRaises(ValueError):
+            create_codec("gif")
+
+    def test_codec_is_abstract(self):
+        """Тест: базовый кодек нельзя создать без decode и encode."""
+        with self.assertRaises(TypeError):
+            ImageCodec()
+
+    def test_lazy_images_decode_with_configured_codec(self):
+        """Тест: ленивые изображения из хранилища и API декодируются выбранным кодеком."""
+        decoded = []
+
+        class RecordingCodec(OpenCVCodec):
+            def decode(self, encoded, scale=1):
+                decoded.append(scale)
+                return super().decode(encoded, scale)
+
+        codec = RecordingCodec()
+        storage = ImageStorage(Path(tempfile.mkdtemp()), codec=codec)
+        image = ImageCatFactory.create_image_cat(
+            index=1, filename="cat", extension=".png", data=self.rgb, url=None, breeds=[]
+        )
+        lazy = storage.load_image(storage.save_image(image), lazy=True)
+        np.testing.assert_array_equal(lazy.data, self.rgb)
+
+        item = {"index": 1, "id": "cat", "ext": ".png", "url": None, "breeds": []}
+        api_image = CatAPI(codec=codec).build_image(item, codec.encode(self.rgb, ".png"), lazy=True, scale=2)
+        self.assertEqual(api_image.data.shape, (24, 32, 3))
+        self.assertEqual(decoded, [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
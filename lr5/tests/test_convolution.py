@@ -1,4 +1,7 @@
+import pickle
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
@@ -44,6 +47,191 @@ class TestConvolution(unittest.TestCase):
         self.assertEqual(out.data.shape, self.rgb.shape)
         self.assertIn("_conv_cv2", out.filename)
 
+    def test_separable_detection(self):
+        """Тест распознавания разделимых ядер (ранг 1)."""
+        sobel_x = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=float)
+        for kernel in (np.ones((3, 3)) / 100.0, sobel_x):
+            conv = Convolution(kernel)
+            self.assertTrue(conv.separable)
+            np.testing.assert_allclose(np.outer(conv.kernel_col, conv.kernel_row), kernel)
+        self.assertFalse(Convolution(self.kernel_sharpen).separable)
+
+    def test_separable_matches_direct(self):
+        """Тест: двухпроходная свёртка совпадает с прямой (с точностью до округления)."""
+        rng = np.random.default_rng(0)
+        data = rng.integers(0, 256, (16, 19, 3), dtype=np.uint8)
+        image = ImageCatFactory.create_image_cat(filename="s", extension=".png", data=data, url=None, breeds=[])
+        kernel = np.outer([1.0, 2.0, 1.0], [-1.0, 0.0, 1.0]) / 4.0
+        conv = Convolution(kernel)
+
+        direct = image.apply_convolution(conv.kernel).astype(int)
+        separable = conv.convolution(image).data.astype(int)
+        self.assertLessEqual(np.abs(direct - separable).max(), 1)
+
+        direct_cv2 = conv._filter2d(data).astype(int)
+        separable_cv2 = conv.convolution_cv2(image).data.astype(int)
+        self.assertLessEqual(np.abs(direct_cv2 - separable_cv2).max(), 1)
+
+    def test_fft_matches_direct(self):
+        """Тест: FFT-свёртка совпадает с прямой, включая паддинг нулями и чётные ядра."""
+        rng = np.random.default_rng(1)
+        for shape in [(23, 31, 3), (23, 31)]:
+            data = rng.integers(0, 256, shape, dtype=np.uint8)
+            image = ImageCatFactory.create_image_cat(filename="f", extension=".png", data=data, url=None, breeds=[])
+            for kernel in (self.kernel_sharpen, rng.random((4, 6)) / 6.0, rng.random((9, 9)) / 20.0):
+                direct = Convolution(kernel, method="direct").convolution(image).data.astype(int)
+                fft = Convolution(kernel, method="fft").convolution(image).data.astype(int)
+                self.assertLessEqual(np.abs(direct - fft).max(), 1)
+
+    def test_fft_is_exact_for_integer_kernels(self):
+        """Тест: для целых ядер шум FFT не срывает целые значения, результат совпадает с прямым."""
+        rng = np.random.default_rng(2)
+        data = rng.integers(0, 256, (40, 50, 3), dtype=np.uint8)
+        image = ImageCatFactory.create_image_cat(filename="f", extension=".png", data=data, url=None, breeds=[])
+        for kernel in (self.kernel_sharpen, np.ones((7, 7)), rng.integers(-3, 4, (5, 5)).astype(float)):
+            direct = Convolution(kernel, method="direct").convolution(image).data
+            fft = Convolution(kernel, method="fft").convolution(image).data
+            np.testing.assert_array_equal(fft, direct)
+
+    def test_auto_strategy_selection(self):
+        """Тест автоматического выбора между прямой свёрткой и FFT."""
+        rng = np.random.default_rng(2)
+        self.assertEqual(Convolution(self.kernel_sharpen).select_strategy((768, 1024, 3)), "direct")
+        self.assertEqual(Convolution(np.outer([1, 2, 1], [1, 0, -1])).select_strategy((768, 1024, 3)), "separable")
+        self.assertEqual(Convolution(np.ones((31, 31))).select_strategy((768, 1024, 3)), "box")
+        self.assertEqual(Convolution(rng.random((31, 31))).select_strategy((768, 1024, 3)), "fft")
+        self.assertEqual(Convolution(rng.random((31, 31)), method="direct").select_strategy((768, 1024)), "direct")
+        self.assertEqual(Convolution(self.kernel_sharpen, method="fft").select_strategy((5, 5)), "fft")
+        with self.assertRaises(ValueError):
+            Convolution(self.kernel_sharpen, method="winograd")
+
+    def test_box_matches_direct(self):
+        """Тест: box-фильтр через интегральное изображение совпадает с прямой свёрткой."""
+        rng = np.random.default_rng(3)
+        for shape in [(23, 31, 3), (23, 31)]:
+            data = rng.integers(0, 256, shape, dtype=np.uint8)
+            image = ImageCatFactory.create_image_cat(filename="b", extension=".png", data=data, url=None, breeds=[])
+            for kernel in (np.ones((3, 3)) / 100.0, np.ones((4, 6)) / 24.0, np.ones((15, 15)) / 225.0):
+                conv = Convolution(kernel)
+                self.assertTrue(conv.is_box)
+                direct = image.apply_convolution(conv.kernel).astype(int)
+                box = conv.convolution(image).data.astype(int)
+                self.assertLessEqual(np.abs(direct - box).max(), 1)
+        self.assertFalse(Convolution(self.kernel_sharpen).is_box)
+
+    def test_box_float_input(self):
+        """Тест: дробные данные не усекаются в таблице сумм и в режиме "auto" не идут через box."""
+        data = np.array([[2.6, 3.7, 3.7, 3.7, 2.6]])
+        image = ImageCatFactory.create_image_cat(filename="b", extension=".png", data=data, url=None, breeds=[])
+        kernel = np.ones((1, 3))
+        np.testing.assert_array_equal(image.apply_box_filter(1, 3, 1.0), image.apply_convolution(kernel))
+        np.testing.assert_array_equal(image.apply_box_filter(1, 3, 1.0), [[6, 10, 11, 10, 6]])
+
+        rng = np.random.default_rng(8)
+        data = rng.random((23, 31, 3)) * 255
+        image = ImageCatFactory.create_image_cat(filename="b", extension=".png", data=data, url=None, breeds=[])
+        box = Convolution(np.ones((5, 5)) / 25.0)
+        self.assertEqual(box.select_strategy(data.shape, data.dtype), "separable")
+        self.assertEqual(box.select_strategy(data.shape, np.uint8), "box")
+        direct = image.apply_convolution(box.kernel).astype(int)
+        self.assertLessEqual(np.abs(image.apply_box_filter(5, 5, 1 / 25.0).astype(int) - direct).max(), 1)
+        np.testing.assert_array_equal(box.convolution(image).data, image.apply_separable_convolution(
+            box.kernel_row, box.kernel_col))
+
+    def test_auto_is_exact_for_small_kernels(self):
+        """Тест: в режиме "auto" малые ядра дают побитово тот же результат, что прямая свёртка."""
+        rng = np.random.default_rng(9)
+        data = rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)
+        image = ImageCatFactory.create_image_cat(filename="e", extension=".png", data=data, url=None, breeds=[])
+        sobel = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=float)
+        for kernel, strategy in ((np.ones((3, 3)) / 100.0, "direct"), (np.ones((3, 3)) / 9.0, "direct"),
+                                 (sobel, "separable"), (np.outer([1, 2, 1], [1, 2, 1]) / 16.0, "separable")):
+            conv = Convolution(kernel)
+            self.assertEqual(conv.select_strategy(data.shape, data.dtype), strategy)
+            np.testing.assert_array_equal(conv.convolution(image).data, image.apply_convolution(conv.kernel))
+
+        # Для больших ядер допускается отличие на 1 уровень
+        self.assertEqual(Convolution(np.ones((5, 5)) / 25.0).select_strategy(data.shape, np.uint8), "box")
+        self.assertEqual(Convolution(np.outer(np.ones(5), np.arange(1.0, 6.0)) / 7.0).select_strategy(
+            data.shape, np.uint8), "separable")
+
+    def test_tiled_matches_whole_image(self):
+        """Тест: свёртка тайлами с halo совпадает со свёрткой всего изображения."""
+        rng = np.random.default_rng(4)
+        kernels = (self.kernel_sharpen, np.outer([1, 2, 1], [1, 0, -1]) / 4.0, np.ones((5, 5)) / 25.0,
+                   rng.random((4, 6)) / 6.0)
+        for shape in [(23, 31, 3), (23, 31)]:
+            data = rng.integers(0, 256, shape, dtype=np.uint8)
+            image = ImageCatFactory.create_image_cat(filename="t", extension=".png", data=data, url=None, breeds=[])
+            for kernel in kernels:
+                whole = Convolution(kernel)
+                tiled = Convolution(kernel, tile_size=7)
+                np.testing.assert_array_equal(tiled.convolution(image).data, whole.convolution(image).data)
+                np.testing.assert_array_equal(tiled.filter_cv2(data), whole.filter_cv2(data))
+
+    def test_tiled_cv2_even_kernel_small_tiles(self):
+        """Тест: OpenCV тайлами совпадает со всем изображением для чётных ядер и тайлов меньше halo."""
+        rng = np.random.default_rng(6)
+        for shape, kernel_shape, tile_size in [((26, 4, 3), (8, 2), 1), ((26, 14, 3), (8, 7), 1),
+                                               ((26, 14), (8, 7), 3), ((5, 3), (8, 6), 2)]:
+            data = rng.integers(0, 256, shape, dtype=np.uint8)
+            kernel = rng.random(kernel_shape) / kernel_shape[0]
+            np.testing.assert_array_equal(Convolution(kernel, tile_size=tile_size).filter_cv2(data),
+                                          Convolution(kernel).filter_cv2(data))
+
+    def test_threaded_matches_whole_image(self):
+        """Тест: параллельная свёртка полосами в потоках совпадает с последовательной."""
+        rng = np.random.default_rng(5)
+        data = rng.integers(0, 256, (41, 29, 3), dtype=np.uint8)
+        image = ImageCatFactory.create_image_cat(filename="p", extension=".png", data=data, url=None, breeds=[])
+        for kernel in (self.kernel_sharpen, np.ones((5, 5)) / 25.0):
+            whole = Convolution(kernel)
+            for threaded in (Convolution(kernel, workers=4), Convolution(kernel, tile_size=8, workers=3)):
+                np.testing.assert_array_equal(threaded.convolution(image).data, whole.convolution(image).data)
+                np.testing.assert_array_equal(threaded.filter_cv2(data), whole.filter_cv2(data))
+        with self.assertRaises(ValueError):
+            Convolution(self.kernel_sharpen, workers=0)
+
+    def test_threaded_even_kernel_reuses_pool(self):
+        """Тест: полосы в потоках с чётным ядром совпадают с последовательной свёрткой, пул один на объект."""
+        rng = np.random.default_rng(7)
+        data = rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)
+        kernel = rng.random((4, 4)) / 4.0
+        expected = Convolution(kernel).filter_cv2(data)
+
+        threaded = Convolution(kernel, workers=64)
+        np.testing.assert_array_equal(threaded.filter_cv2(data), expected)
+        pool = threaded._thread_pool()
+        np.testing.assert_array_equal(threaded.filter_cv2(data), expected)
+        self.assertIs(threaded._thread_pool(), pool)
+        threaded.shutdown()
+
+        # Общий объект: одновременные вызовы из нескольких потоков создают один пул
+        shared = Convolution(kernel, workers=4)
+        barrier = threading.Barrier(8)
+
+        def first_use(_):
+            barrier.wait()
+            return shared._thread_pool()
+
+        with ThreadPoolExecutor(max_workers=8) as callers:
+            pools = set(map(id, callers.map(first_use, range(8))))
+        self.assertEqual(len(pools), 1)
+        restored = pickle.loads(pickle.dumps(shared))
+        np.testing.assert_array_equal(restored.filter_cv2(data), expected)
+        shared.shutdown()
+        restored.shutdown()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            shared = Convolution(kernel, workers=8, executor=executor)
+            np.testing.assert_array_equal(shared.filter_cv2(data), expected)
+            self.assertIs(shared._thread_pool(), executor)
+
+    def test_invalid_tile_size(self):
+        """Тест ошибки при неположительном размере тайла."""
+        with self.assertRaises(ValueError):
+            Convolution(self.kernel_sharpen, tile_size=0)
+
     def test_invalid_kernel(self):
         """Тест ошибки при некорректном ядре."""
         with self.assertRaises(ValueError):
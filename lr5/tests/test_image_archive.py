@@ -0,0 +1,89 @@
+import asyncio
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from lr5.core.entity.image_cat import ImageCatFactory
+from lr5.core.storage.image_archive import ArchiveStorage, ImageArchive
+
+
+class TestImageArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+
+    def test_rotates_shards_and_reads_by_name(self):
+        """Тест: шарды ограничены по размеру, чтение по имени и последовательный обход совпадают."""
+        files = {f"img_{i}.png": bytes([i]) * 3000 for i in range(10)}
+        with ImageArchive(self.tmpdir, max_shard_bytes=8 * 1024) as archive:
+            for name, data in files.items():
+                archive.add(name, data)
+            # Чтение до закрытия шарда
+            self.assertEqual(archive.read("img_9.png"), files["img_9.png"])
+
+        shards = sorted(self.tmpdir.glob("shard-*.tar"))
+        self.assertGreater(len(shards), 1)
+        for shard in shards:
+            with tarfile.open(shard) as tar:
+                self.assertTrue(all(name in files for name in tar.getnames()))
+
+        reopened = ImageArchive(self.tmpdir, max_shard_bytes=8 * 1024)
+        self.assertEqual(len(reopened), len(files))
+        for name, data in files.items():
+            self.assertEqual(reopened.read(name), data)
+        self.assertEqual(dict(reopened), files)
+        self.assertRaises(FileNotFoundError, reopened.read, "missing.png")
+
+    def test_append_after_reopen_and_overwrite(self):
+        """Тест: после повторного открытия запись продолжается, последняя версия имени побеждает."""
+        with ImageArchive(self.tmpdir) as archive:
+            archive.add("a.png", b"old")
+            archive.add("b.png", b"bbb")
+        with ImageArchive(self.tmpdir) as archive:
+            archive.add("a.png", b"new")
+
+        archive = ImageArchive(self.tmpdir)
+        self.assertEqual(len(list(self.tmpdir.glob("shard-*.tar"))), 1)
+        self.assertEqual(archive.read("a.png"), b"new")
+        self.assertEqual(list(archive), [("b.png", b"bbb"), ("a.png", b"new")])
+
+    def test_invalid_shard_size(self):
+        self.assertRaises(ValueError, ImageArchive, self.tmpdir, max_shard_bytes=0)
+
+
+class TestArchiveStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.data = (np.random.rand(8, 8, 3) * 255).astype(np.uint8)
+
+    def make_image(self, i: int):
+        return ImageCatFactory.create_image_cat(
+            index=i, filename=f"img_{i}", extension=".png", data=self.data, url=None, breeds=[]
+        )
+
+    def test_save_and_load_through_archive(self):
+        """Тест: синхронное, асинхронное и фоновое сохранение пишут в шарды, а не в отдельные файлы."""
+        out = self.tmpdir / "cv2"
+        with ArchiveStorage(self.tmpdir) as storage:
+            path = storage.save_image(self.make_image(0), out)
+            asyncio.run(storage.save_image_async(self.make_image(1), out))
+            with storage.writer(fsync=True) as writer:
+                futures = [writer.submit(self.make_image(i), out) for i in range(2, 5)]
+            self.assertEqual(writer.stats()["written"], 3)
+
+        self.assertEqual(path, out / "img_0.png")
+        self.assertEqual([p.name for p in out.iterdir()], ["shard-00000.tar"])
+
+        storage = ArchiveStorage(self.tmpdir)
+        loaded = storage.load_image(futures[-1].result())
+        self.assertEqual(loaded.filename, "img_4")
+        np.testing.assert_array_equal(loaded.data, self.data)
+        self.assertEqual(sorted(image.filename for image in storage.iter_images(out, lazy=True)),
+                         [f"img_{i}" for i in range(5)])
+        self.assertRaises(FileNotFoundError, storage.load_image, out / "missing.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+
+from lr5.core.entity.image_batch import ImageBatch
+from lr5.core.entity.image_cat import ImageCatFactory, ImageCatGray
+from lr5.core.image_operations.convolution import Convolution
+from lr5.core.image_operations.edge_detection import EdgeDetection
+from lr5.core.image_operations.gamma_correction import GammaCorrection
+from lr5.core.image_operations.grayscale_converter import GrayscaleConverter
+
+
+class TestImageBatch(unittest.TestCase):
+    def setUp(self):
+        """Набор изображений разных форм: две группы RGB и одна grayscale."""
+        rng = np.random.default_rng(0)
+        shapes = [(12, 16, 3), (9, 7, 3), (12, 16, 3), (12, 16), (12, 16, 3)]
+        self.images = [
+            ImageCatFactory.create_image_cat(
+                index=i, filename=f"img{i}", extension=".png",
+                data=rng.integers(0, 256, shape, dtype=np.uint8), url=None, breeds=[]
+            )
+            for i, shape in enumerate(shapes)
+        ]
+
+    def assert_same_images(self, batch_result, single_result):
+        self.assertEqual(len(batch_result), len(single_result))
+        for got, expected in zip(batch_result, single_result):
+            self.assertEqual(got.filename, expected.filename)
+            self.assertEqual(got.index, expected.index)
+            np.testing.assert_array_equal(got.data, expected.data)
+
+    def test_group_by_shape(self):
+        """Тест группировки изображений по форме в непрерывные стеки."""
+        batches = ImageBatch.group(self.images)
+        self.assertEqual(sorted(len(b.positions) for b in batches), [1, 1, 3])
+        for batch in batches:
+            self.assertTrue(batch.data.flags["C_CONTIGUOUS"])
+            self.assertEqual(batch.data.shape[0], len(batch.images))
+
+    def test_convolution_batch(self):
+        """Тест: пакетная свёртка совпадает с поэлементной и сохраняет порядок."""
+        for kernel in (np.ones((3, 3)) / 100.0, np.outer([1, 2, 1], [-1, 0, 1]), np.ones((5, 5)) / 25.0):
+            conv = Convolution(kernel)
+            self.assert_same_images(conv.convolution_batch(self.images),
+                                    [conv.convolution(image) for image in self.images])
+            self.assert_same_images(conv.convolution_cv2_batch(self.images),
+                                    [conv.convolution_cv2(image) for image in self.images])
+
+    def test_convolution_stack_chunks(self):
+        """Тест: порции пакетной свёртки зависят от размера изображений, результат не зависит от порций."""
+        kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=float)
+        conv = Convolution(kernel)
+        self.assertEqual(conv.batch_step((32, 32, 3)), 14)
+        self.assertEqual(conv.batch_step((300, 300, 3)), 1)
+        self.assertEqual(Convolution(kernel, batch_chunk_bytes=64 * 1024 * 1024).batch_step((300, 300, 3)), 10)
+
+        rng = np.random.default_rng(1)
+        stack = rng.integers(0, 256, (30, 32, 32, 3), dtype=np.uint8)
+        expected = np.stack([Convolution(kernel, batch_chunk_bytes=1).convolve_stack(stack[i:i + 1])[0]
+                             for i in range(len(stack))])
+        np.testing.assert_array_equal(conv.convolve_stack(stack), expected)
+        with self.assertRaises(ValueError):
+            Convolution(kernel, batch_chunk_bytes=0)
+
+    def test_gamma_and_grayscale_batch(self):
+        """Тест пакетной гамма-коррекции и преобразования в grayscale."""
+        gamma = GammaCorrection(2.2)
+        self.assert_same_images(gamma.gamma_correction_batch(self.images),
+                                [gamma.gamma_correction(image) for image in self.images])
+        self.assert_same_images(gamma.gamma_correction_cv2_batch(self.images),
+                                [gamma.gamma_correction_cv2(image) for image in self.images])
+
+        gray = GrayscaleConverter.to_grayscale_batch(self.images)
+        self.assert_same_images(gray, [GrayscaleConverter.to_grayscale(image) for image in self.images])
+        self.assertTrue(all(isinstance(image, ImageCatGray) for image in gray))
+        self.assert_same_images(GrayscaleConverter.to_grayscale_cv2_batch(self.images),
+                                [GrayscaleConverter.to_grayscale_cv2(image) for image in self.images])
+
+    def test_edge_detection_batch(self):
+        """Тест: пакетный оператор Собеля нормирует каждое изображение отдельно."""
+        detector = EdgeDetection()
+        self.assert_same_images(detector.edge_detection_batch(self.images),
+                                [detector.edge_detection(image) for image in self.images])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from aiohttp import web
+
+from lr5.core.api.cat_api import CatAPI
+from lr5.core.storage.image_cache import ImageCache
+from lr5.tests.test_api import LocalServer
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+
+    def test_put_get_and_persist(self):
+        """Тест: байты лежат в шардированных каталогах, индекс переживает перезапуск."""
+        cache = ImageCache(self.root)
+        cache.put("http://x/a.jpg", b"aaa", {"ETag": '"v1"'})
+
+        key = ImageCache.key("http://x/a.jpg")
+        self.assertTrue((self.root / "objects" / key[:2] / key).exists())
+        self.assertEqual(cache.get("http://x/a.jpg"), b"aaa")
+        self.assertIsNone(cache.get("http://x/b.jpg"))
+        cache.close()
+
+        reopened = ImageCache(self.root)
+        self.assertEqual(reopened.get("http://x/a.jpg"), b"aaa")
+        self.assertEqual(reopened.validators("http://x/a.jpg"), {"If-None-Match": '"v1"'})
+
+    def test_lru_eviction(self):
+        """Тест: при превышении размера вытесняются давно использованные записи."""
+        cache = ImageCache(self.root, max_bytes=10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.get("a")  # a становится последней использованной
+        cache.put("c", b"1234")
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.total_bytes, 8)
+
+    def test_hits_do_not_rewrite_index(self):
+        """Тест: попадание меняет порядок LRU в памяти, index.json пишется только при close."""
+        cache = ImageCache(self.root)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        cache.flush()
+        index = self.root / ImageCache.INDEX_NAME
+        saved = index.read_text(encoding="utf-8")
+
+        with patch.object(ImageCache, "_save_index", wraps=cache._save_index) as save:
+            for _ in range(5):
+                cache.get("a")
+            save.assert_not_called()
+        self.assertEqual(index.read_text(encoding="utf-8"), saved)
+
+        cache.close()
+        self.assertEqual(list(ImageCache(self.root)._entries.values())[-1]["url"], "a")
+
+    def test_puts_save_index_periodically(self):
+        """Тест: запись без вытеснения не переписывает index.json, он сохраняется раз в INDEX_SAVE_EVERY записей."""
+        cache = ImageCache(self.root)
+        with patch.object(ImageCache, "INDEX_SAVE_EVERY", 3), \
+                patch.object(ImageCache, "_save_index", wraps=cache._save_index) as save:
+            for i in range(7):
+                cache.put(f"http://x/{i}.jpg", b"1")
+            self.assertEqual(save.call_count, 2)
+            cache.close()
+            self.assertEqual(save.call_count, 3)
+        self.assertEqual(len(ImageCache(self.root)), 7)
+
+    def test_eviction_saves_index(self):
+        """Тест: вытеснение сразу сохраняет индекс, удалённые файлы не остаются в index.json."""
+        cache = ImageCache(self.root, max_bytes=4)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        self.assertEqual([entry["url"] for entry in ImageCache(self.root)._entries.values()], ["b"])
+
+    def test_stale_entry_is_revalidated(self):
+        """Тест: устаревшая запись проверяется условным запросом, ответ 304 отдаёт байты из кэша."""
+        hits = {"full": 0, "not_modified": 0}
+
+        async def image(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                hits["not_modified"] += 1
+                return web.Response(status=304)
+            hits["full"] += 1
+            return web.Response(body=b"payload", headers={"ETag": '"v1"'})
+
+        async def scenario():
+            async with LocalServer([web.get("/a.jpg", image)]) as server:
+                api = CatAPI(api_key=None, cache=ImageCache(self.root, max_age=0))
+                async with api.create_session() as session:
+                    item = {"index": 1, "url": f"{server.url}/a.jpg"}
+                    first = await api.fetch_image(session, item)
+                    second = await api.fetch_image(session, item)
+                return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual(first, (1, b"payload"))
+        self.assertEqual(second, (1, b"payload"))
+        self.assertEqual(hits, {"full": 1, "not_modified": 1})
+
+    @patch("requests.Session.get")
+    def test_sync_download_uses_cache(self, mock_get):
+        """Тест: синхронная загрузка берёт свежую запись из кэша без обращения к сети."""
+        response = MagicMock(status_code=200, content=b"bytes", headers={"Last-Modified": "yesterday"})
+        mock_get.return_value = response
+        api = CatAPI(api_key=None, cache=ImageCache(self.root))
+
+        self.assertEqual(api._get_image_bytes("http://x/a.jpg"), b"bytes")
+        self.assertEqual(api._get_image_bytes("http://x/a.jpg"), b"bytes")
+        self.assertEqual(mock_get.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
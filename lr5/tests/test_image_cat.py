@@ -1,8 +1,27 @@
+import io
 import unittest
 
 import numpy as np
+from PIL import Image as PILImage
 
 from lr5.core.entity.image_cat import ImageCatFactory, ImageCatRGB, ImageCatGray
+from lr5.core.entity.lazy_image_cat import LazyImageCatFactory
+
+
+def reference_convolution(data: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """Поэлементная свёртка в цикле — эталон для векторизованной версии."""
+    kh, kw = kernel.shape
+    pad = ((kh // 2, kh // 2), (kw // 2, kw // 2)) + ((0, 0),) * (data.ndim - 2)
+    padded = np.pad(data, pad, mode="constant")
+    out = np.zeros_like(data, dtype=float)
+    for i in range(data.shape[0]):
+        for j in range(data.shape[1]):
+            region = padded[i:i + kh, j:j + kw]
+            if data.ndim == 3:
+                out[i, j] = np.sum(region * kernel[:, :, None], axis=(0, 1))
+            else:
+                out[i, j] = np.sum(region * kernel)
+    return np.clip(out, 0, 255).astype(np.uint8)
 
 
 class TestImageCat(unittest.TestCase):
@@ -43,6 +62,50 @@ class TestImageCat(unittest.TestCase):
         out_gray = self.img_gray.apply_convolution(kernel)
         self.assertEqual(out_gray.shape, self.gray.shape)
 
+    def test_convolution_matches_reference(self):
+        """Векторизованная свёртка побитово совпадает с поэлементным циклом."""
+        rng = np.random.default_rng(0)
+        kernels = [
+            np.ones((3, 3)) / 100.0,
+            np.ones((7, 7)) / 49.0,
+            np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=float),
+            rng.normal(size=(5, 5)),
+            rng.random((4, 6)),
+        ]
+        for kernel in kernels:
+            for shape in [(37, 41, 3), (37, 41)]:
+                data = rng.integers(0, 256, shape, dtype=np.uint8)
+                image = ImageCatFactory.create_image_cat(
+                    filename="r", extension=".png", data=data, url="", breeds=[]
+                )
+                np.testing.assert_array_equal(image.apply_convolution(kernel),
+                                              reference_convolution(data, kernel))
+
+    def test_lazy_image_decodes_on_access(self):
+        """Тест ленивого ImageCat: декодирование при обращении к data и освобождение буфера."""
+        buf = io.BytesIO()
+        PILImage.fromarray(self.rgb).save(buf, format="PNG")
+        image = LazyImageCatFactory.create_image_cat(
+            index=3, filename="lazy", extension=".png", encoded=buf.getvalue(), url="", breeds=[]
+        )
+        self.assertIsInstance(image, ImageCatRGB)
+        self.assertFalse(image.is_decoded)
+
+        with image.decoded() as data:
+            np.testing.assert_array_equal(data, self.rgb)
+            self.assertTrue(image.is_decoded)
+        self.assertFalse(image.is_decoded)
+
+        # После освобождения данные снова получаются из байтов
+        self.assertEqual(image.apply_convolution(np.ones((3, 3)) / 9.0).shape, self.rgb.shape)
+
+        buf = io.BytesIO()
+        PILImage.fromarray(self.gray).save(buf, format="PNG")
+        gray = LazyImageCatFactory.create_image_cat(filename="g", extension=".png", encoded=buf.getvalue(),
+                                                    url="", breeds=[])
+        self.assertIsInstance(gray, ImageCatGray)
+        np.testing.assert_array_equal(gray.data, self.gray)
+
     def test_add_images_same_type(self):
         """Тест сложения изображений одного типа."""
         # Сложение RGB+RGB -> RGB
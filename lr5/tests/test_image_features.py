@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from lr5.core.api.cat_api import CatAPI
+from lr5.core.entity.image_cat import ImageCatFactory
+from lr5.core.image_operations.corner_detection import CornerDetection
+from lr5.core.image_operations.edge_detection import EdgeDetection
+from lr5.core.image_operations.image_features import ImageFeatures
+from lr5.core.service.cat_image_processor import CatImageProcessor
+from lr5.core.storage.image_storage import ImageStorage
+
+
+class TestImageFeatures(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = ImageCatFactory.create_image_cat(
+            index=1, filename="cat", extension=".png",
+            data=rng.integers(0, 256, (20, 24, 3), dtype=np.uint8), url=None, breeds=[]
+        )
+
+    def test_shared_gradients_match_operations(self):
+        """Тест: результаты по общим градиентам совпадают с отдельными операциями."""
+        features = ImageFeatures(self.image)
+        detector = EdgeDetection()
+        np.testing.assert_array_equal(detector.edges_from_gradients(self.image, *features.gradients).data,
+                                      detector.edge_detection(self.image).data)
+
+        corners = CornerDetection()
+        np.testing.assert_array_equal(corners.corner_detection_from_gradients(*features.gradients),
+                                      corners.corner_detection(self.image))
+
+        # Градиенты считаются один раз
+        self.assertIs(features.gradients, features.gradients)
+
+    def test_process_images_fetches_once(self):
+        """Тест: несколько операций выполняются над одним набором изображений."""
+        tmpdir = Path(tempfile.mkdtemp())
+        processor = CatImageProcessor(api_key="key")
+        processor.storage = ImageStorage(tmpdir)
+        processor.originals_dir = tmpdir / "originals"
+        processor.manual_count_dir = tmpdir / "manual_count"
+        processor.cv2_dir = tmpdir / "cv2"
+
+        with patch.object(CatAPI, "get_cat_images", return_value=[self.image]) as get_images:
+            processor.process_images(["edges", "corners", "grayscale"], limit=1)
+
+        get_images.assert_called_once_with(limit=1, lazy=True)
+        self.assertEqual(len(list((tmpdir / "originals").iterdir())), 1)
+        self.assertEqual(sorted(p.name for p in (tmpdir / "manual_count").iterdir()),
+                         ["cat_corn.png", "cat_edge.png", "cat_gray.png"])
+        self.assertEqual(len(list((tmpdir / "cv2").iterdir())), 3)
+
+        with self.assertRaises(ValueError):
+            processor.process_images(["blur"])
+
+
+if __name__ == "__main__":
+    unittest.main()
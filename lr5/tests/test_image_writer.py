@@ -0,0 +1,93 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from PIL import Image as PILImage
+
+from lr5.core.codec.image_codec import PILCodec
+from lr5.core.entity.image_cat import ImageCatFactory
+from lr5.core.storage.image_storage import ImageStorage
+from lr5.core.storage.image_writer import ImageWriter
+
+
+class TestImageWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.storage = ImageStorage(self.tmpdir)
+        self.data = (np.random.rand(8, 8, 3) * 255).astype(np.uint8)
+
+    def make_image(self, i: int, extension: str = ".png"):
+        return ImageCatFactory.create_image_cat(
+            index=i, filename=f"img_{i}", extension=extension, data=self.data, url=None, breeds=[]
+        )
+
+    def test_submit_returns_futures_and_close_flushes(self):
+        """Тест: все отправленные изображения записаны после close, Future возвращают пути."""
+        with self.storage.writer(workers=3, queue_size=2, fsync=True) as writer:
+            futures = [writer.submit(self.make_image(i), self.tmpdir / "out") for i in range(10)]
+
+        for i, future in enumerate(futures):
+            path = future.result(timeout=0)
+            self.assertEqual(path, self.tmpdir / "out" / f"img_{i}.png")
+            np.testing.assert_array_equal(np.asarray(PILImage.open(path)), self.data)
+
+        stats = writer.stats()
+        self.assertEqual(stats["written"], 10)
+        self.assertEqual(stats["failed"], 0)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["bytes"], sum(f.result().stat().st_size for f in futures))
+        self.assertRaises(RuntimeError, writer.submit, self.make_image(11))
+
+    def test_bounded_queue_applies_backpressure(self):
+        """Тест: при заполненной очереди submit ждёт освобождения места."""
+        release = threading.Event()
+
+        class SlowCodec(PILCodec):
+            def encode(self, data, extension):
+                release.wait(5)
+                return super().encode(data, extension)
+
+        storage = ImageStorage(self.tmpdir, codec=SlowCodec())
+        writer = ImageWriter(storage, workers=1, queue_size=1)
+        writer.submit(self.make_image(0))  # взят потоком записи
+        writer.submit(self.make_image(1))  # занимает очередь
+
+        blocked = threading.Thread(target=writer.submit, args=(self.make_image(2),))
+        blocked.start()
+        blocked.join(0.2)
+        self.assertTrue(blocked.is_alive())
+        self.assertGreaterEqual(writer.queue_depth, 1)
+
+        release.set()
+        blocked.join(5)
+        writer.close()
+        self.assertEqual(writer.stats()["written"], 3)
+
+    def test_errors_are_reported_through_future(self):
+        """Тест: ошибка записи одного изображения не останавливает остальные."""
+        with self.storage.writer() as writer:
+            bad = writer.submit(self.make_image(0, extension=".bmp"))
+            good = writer.submit(self.make_image(1))
+            writer.flush()
+            self.assertIsInstance(bad.exception(), ValueError)
+            self.assertTrue(good.result().exists())
+        self.assertEqual(writer.stats()["failed"], 1)
+
+    def test_directory_creation_is_cached(self):
+        """Тест: каталог создаётся один раз, а не на каждое сохранение."""
+        out = self.tmpdir / "cached"
+        with mock.patch.object(Path, "mkdir", autospec=True, side_effect=Path.mkdir) as mkdir:
+            for i in range(3):
+                self.storage.save_image(self.make_image(i), out)
+        self.assertEqual([call.args[0] for call in mkdir.call_args_list], [out])
+
+    def test_invalid_settings(self):
+        self.assertRaises(ValueError, ImageWriter, self.storage, workers=0)
+        self.assertRaises(ValueError, ImageWriter, self.storage, queue_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
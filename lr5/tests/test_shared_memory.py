@@ -0,0 +1,48 @@
+import os
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from lr5.core.image_operations.convolution import Convolution
+from lr5.utils.shared_memory_transport import SharedArray, SharedMemoryTransport
+
+
+def crash_worker(spec):
+    """Воркер, аварийно завершающий процесс после подключения к сегменту."""
+    SharedArray.attach(spec)
+    os._exit(1)
+
+
+class TestSharedMemoryTransport(unittest.TestCase):
+    def test_convolution_through_shared_memory(self):
+        """Тест: свёртка в процессе через разделяемую память совпадает с локальной."""
+        data = np.random.default_rng(0).integers(0, 256, (20, 30, 3), dtype=np.uint8)
+        kernel = np.ones((3, 3)) / 100.0
+
+        with SharedMemoryTransport() as transport:
+            src = transport.from_array(data)
+            dst = transport.create(data.shape, data.dtype)
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                idx, suffix = pool.submit(Convolution.run_convolution_task_shared,
+                                          (1, kernel, src.spec, dst.spec)).result()
+            self.assertEqual((idx, suffix), (1, "_conv"))
+            np.testing.assert_array_equal(dst.array, Convolution(kernel).filter_cv2(data))
+
+    def test_segments_unlinked_after_worker_crash(self):
+        """Тест: при падении воркера сегменты всё равно удаляются."""
+        names = []
+        with self.assertRaises(BrokenProcessPool):
+            with SharedMemoryTransport() as transport:
+                shared = transport.from_array(np.zeros((4, 4), dtype=np.uint8))
+                names.append(shared.spec)
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    pool.submit(crash_worker, shared.spec).result()
+
+        with self.assertRaises(FileNotFoundError):
+            SharedArray.attach(names[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
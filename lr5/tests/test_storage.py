@@ -1,11 +1,17 @@
+import asyncio
 import tempfile
+import threading
 import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
 
 import numpy as np
 from PIL import Image as PILImage
 
+from lr5.core.codec.image_codec import AutoCodec, OpenCVCodec, PILCodec
 from lr5.core.entity.image_cat import ImageCatFactory
+from lr5.core.codec.decoding import decode_image
 from lr5.core.storage.image_storage import ImageStorage
 
 
@@ -27,6 +33,62 @@ class TestImageStorage(unittest.TestCase):
         self.assertTrue(out.exists())
         self.assertEqual(out.suffix, ".jpg")
 
+    def test_save_original_writes_encoded_bytes(self):
+        """Тест: оригинал с исходными байтами сохраняется без перекодирования."""
+        buf = BytesIO()
+        PILImage.fromarray(self.data).save(buf, format="JPEG")
+        image = ImageCatFactory.create_image_cat(
+            index=1, filename="orig", extension=".jpg", data=self.data, url=None, breeds=[],
+            encoded=buf.getvalue()
+        )
+        out = self.storage.save_original(image, self.tmpdir / "originals")
+        self.assertEqual(out.read_bytes(), buf.getvalue())
+
+        out_async = asyncio.run(self.storage.save_original_async(image, self.tmpdir / "originals_async"))
+        self.assertEqual(out_async.read_bytes(), buf.getvalue())
+
+        # Без исходных байтов — обычное сохранение с кодированием
+        self.assertTrue(self.storage.save_original(self.image, self.tmpdir / "fallback").exists())
+
+    def test_save_image_async_encodes_off_loop(self):
+        """Тест: асинхронное сохранение кодирует изображения в пуле, а не в потоке цикла событий."""
+        threads = []
+
+        class RecordingCodec(PILCodec):
+            def encode(self, data, extension):
+                threads.append(threading.get_ident())
+                return super().encode(data, extension)
+
+        async def save_all(storage):
+            images = [
+                ImageCatFactory.create_image_cat(
+                    index=i, filename=f"img_{i}", extension=".png", data=self.data, url=None, breeds=[]
+                )
+                for i in range(4)
+            ]
+            paths = await asyncio.gather(*(storage.save_image_async(img, self.tmpdir / "async") for img in images))
+            return threading.get_ident(), paths
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            storage = ImageStorage(self.tmpdir, codec=RecordingCodec(), executor=executor)
+            loop_thread, paths = asyncio.run(save_all(storage))
+
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(loop_thread, threads)
+        for path in paths:
+            np.testing.assert_array_equal(np.asarray(PILImage.open(path)), self.data)
+
+    def test_save_image_async_process_executor(self):
+        """Тест: кодеки передаются в пул процессов, включая AutoCodec с блокировкой."""
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            for codec in (PILCodec(), OpenCVCodec(), AutoCodec()):
+                storage = ImageStorage(self.tmpdir, codec=codec, executor=executor)
+                image = ImageCatFactory.create_image_cat(
+                    index=1, filename=f"proc_{codec.name}", extension=".png", data=self.data, url=None, breeds=[]
+                )
+                out = asyncio.run(storage.save_image_async(image, self.tmpdir / "proc"))
+                np.testing.assert_array_equal(np.asarray(PILImage.open(out)), self.data)
+
     def test_load_image(self):
         """Тест загрузки изображения с диска."""
         # Подготовим файл на диске и загрузим его
@@ -38,6 +100,31 @@ class TestImageStorage(unittest.TestCase):
         self.assertEqual(loaded.extension, ".jpg")
         self.assertEqual(loaded.data.shape, self.data.shape)
 
+    def test_load_image_lazy(self):
+        """Тест ленивой загрузки: данные декодируются при первом обращении."""
+        img_path = self.tmpdir / "load" / "b.png"
+        img_path.parent.mkdir(parents=True, exist_ok=True)
+        PILImage.fromarray(self.data).save(img_path)
+        loaded = self.storage.load_image(img_path, lazy=True)
+        self.assertFalse(loaded.is_decoded)
+        np.testing.assert_array_equal(loaded.data, self.data)
+
+    def test_load_image_scaled(self):
+        """Тест уменьшенного декодирования: JPEG через draft, PNG через reduce."""
+        data = (np.random.rand(64, 48, 3) * 255).astype(np.uint8)
+        for name in ("c.jpg", "c.png"):
+            img_path = self.tmpdir / "scaled" / name
+            img_path.parent.mkdir(parents=True, exist_ok=True)
+            PILImage.fromarray(data).save(img_path)
+            for scale in (2, 4, 8):
+                self.assertEqual(self.storage.load_image(img_path, scale=scale).data.shape,
+                                 (64 // scale, 48 // scale, 3))
+            self.assertEqual(self.storage.load_image(img_path, lazy=True, scale=4).data.shape, (16, 12, 3))
+
+        self.assertEqual(decode_image(img_path.read_bytes(), target_size=(20, 30)).shape, (32, 24, 3))
+        with self.assertRaises(ValueError):
+            self.storage.load_image(img_path, scale=3)
+
 
 if __name__ == "__main__":
     unittest.main()
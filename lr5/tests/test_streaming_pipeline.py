@@ -0,0 +1,80 @@
+import asyncio
+import tempfile
+import unittest
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+from PIL import Image as PILImage
+
+from lr5.core.api.cat_api import CatAPI
+from lr5.core.entity.lazy_image_cat import LazyImageCat
+from lr5.core.image_operations.convolution import Convolution
+from lr5.core.service.streaming_pipeline import StreamingPipeline
+from lr5.core.service.worker_pool import WorkerPool
+from lr5.core.storage.image_storage import ImageStorage
+
+
+def encode_png(data: np.ndarray) -> bytes:
+    buf = BytesIO()
+    PILImage.fromarray(data).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class TestStreamingPipeline(unittest.TestCase):
+    def setUp(self):
+        """Подменяем API: метаданные и байты изображений берутся из памяти."""
+        self.tmpdir = Path(tempfile.mkdtemp())
+        rng = np.random.default_rng(0)
+        self.payloads = {
+            f"cat{i}": encode_png(rng.integers(0, 256, (10, 12, 3), dtype=np.uint8)) for i in range(5)
+        }
+        meta = [{"id": key, "url": f"https://example.com/{key}.png"} for key in self.payloads]
+
+        async def fake_fetch(session, item):
+            if item["id"] == "cat3":
+                raise RuntimeError("сбой сети")
+            await asyncio.sleep(0)
+            return item["index"], self.payloads[item["id"]]
+
+        # Каждая страница возвращает один и тот же набор: повторы должны отбрасываться
+        patcher_meta = patch.object(CatAPI, "_get_page_async", AsyncMock(return_value=meta))
+        patcher_fetch = patch.object(CatAPI, "fetch_image", side_effect=fake_fetch)
+        patcher_meta.start()
+        patcher_fetch.start()
+        self.addCleanup(patcher_meta.stop)
+        self.addCleanup(patcher_fetch.stop)
+
+    def test_pipeline_saves_results_and_isolates_failures(self):
+        """Тест: все изображения, кроме упавшего, сохранены вместе с результатами свёртки."""
+        kernel = np.ones((3, 3)) / 100.0
+        with WorkerPool(max_workers=1) as pool, \
+                patch.object(LazyImageCat, "release", autospec=True, side_effect=LazyImageCat.release) as release:
+            pipeline = StreamingPipeline(CatAPI("key"), ImageStorage(self.tmpdir), pool,
+                                         queue_size=1, downloaders=2, writers=1)
+            saved = asyncio.run(pipeline.run(5, Convolution.run_convolution_task, (kernel,),
+                                             self.tmpdir / "originals", self.tmpdir / "out"))
+
+        self.assertEqual(saved, 8)
+        # Каждое изображение декодировано лениво и освобождено после обработки
+        self.assertEqual(release.call_count, 4)
+        self.assertFalse(any(call.args[0].is_decoded for call in release.call_args_list))
+        originals = sorted(p.name for p in (self.tmpdir / "originals").iterdir())
+        self.assertEqual(originals, ["cat0.png", "cat1.png", "cat2.png", "cat4.png"])
+        self.assertEqual((self.tmpdir / "originals" / "cat0.png").read_bytes(), self.payloads["cat0"])
+
+        result = np.asarray(PILImage.open(self.tmpdir / "out" / "cat0_conv.png"))
+        expected = Convolution(kernel).convolution_cv2(CatAPI("key").build_image(
+            CatAPI.index_images([{"id": "cat0", "url": "x.png"}])[0], self.payloads["cat0"]
+        ))
+        np.testing.assert_array_equal(result, expected.data)
+
+    def test_invalid_queue_size(self):
+        """Тест ошибки при некорректной глубине очереди."""
+        with self.assertRaises(ValueError):
+            StreamingPipeline(CatAPI("key"), ImageStorage(self.tmpdir), WorkerPool(1), queue_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import unittest
+
+import numpy as np
+
+from lr5.core.image_operations.convolution import Convolution
+from lr5.core.image_operations.corner_detection import CornerDetection
+from lr5.core.image_operations.edge_detection import EdgeDetection
+from lr5.core.service.worker_pool import WorkerPool
+
+
+def worker_state(_):
+    """Возвращает pid воркера и число подготовленных ядер."""
+    return os.getpid(), len(Convolution._cache)
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_pool_is_reused_and_preloaded(self):
+        """Тест: процессы переиспользуются между вызовами, ядра готовы после инициализации."""
+        kernels = {"box": np.ones((3, 3)) / 100.0, "sobel": np.outer([1, 2, 1], [-1, 0, 1])}
+        with WorkerPool(max_workers=1, kernels=kernels) as pool:
+            first_pid, cached = asyncio.run(pool.run(worker_state, None))
+            second_pid, _ = pool.submit(worker_state, None).result()
+            self.assertEqual(first_pid, second_pid)
+            self.assertGreaterEqual(cached, len(kernels))
+        self.assertIsNone(pool._executor)
+
+    def test_detectors_use_cached_kernels(self):
+        """Тест: детекторы в задачах берут подготовленные объекты свёртки, а не создают новые."""
+        first, second = EdgeDetection(), EdgeDetection()
+        self.assertIs(first.conv_x, second.conv_x)
+        self.assertIs(CornerDetection().conv_y, Convolution.cached(CornerDetection.SOBEL_Y))
+
+    def test_cache_is_bounded(self):
+        """Тест: кэш ядер не растёт больше CACHE_SIZE и вытесняет давно использованные."""
+        Convolution._cache.clear()
+        first = Convolution.cached(np.ones((3, 3)))
+        for i in range(Convolution.CACHE_SIZE + 3):
+            Convolution.cached(np.full((3, 3), i + 2.0))
+            Convolution.cached(np.ones((3, 3)))  # первое ядро остаётся последним использованным
+        self.assertEqual(len(Convolution._cache), Convolution.CACHE_SIZE)
+        self.assertIs(Convolution.cached(np.ones((3, 3))), first)
+
+    def test_invalid_pool_size(self):
+        """Тест ошибки при некорректном размере пула."""
+        with self.assertRaises(ValueError):
+            WorkerPool(max_workers=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import logging
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SharedArray:
+    """
+    numpy-массив поверх сегмента multiprocessing.shared_memory.
+
+    Между процессами передаётся только spec = (имя сегмента, форма, dtype):
+    воркер подключается к тому же сегменту через attach и работает с данными без копирования.
+    """
+
+    def __init__(self, shm: SharedMemory, shape: tuple, dtype, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @staticmethod
+    def create(shape: tuple, dtype) -> "SharedArray":
+        """Создаёт новый сегмент под массив формы shape (владелец — текущий процесс)."""
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        return SharedArray(SharedMemory(create=True, size=size), tuple(shape), dtype, owner=True)
+
+    @staticmethod
+    def from_array(array: np.ndarray) -> "SharedArray":
+        """Создаёт сегмент и копирует в него array."""
+        shared = SharedArray.create(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @staticmethod
+    def attach(spec: tuple) -> "SharedArray":
+        """Подключается к существующему сегменту по spec, полученному из другого процесса."""
+        name, shape, dtype = spec
+        return SharedArray(SharedMemory(name=name), tuple(shape), np.dtype(dtype), owner=False)
+
+    @property
+    def spec(self) -> tuple:
+        return self.shm.name, self.array.shape, self.array.dtype.str
+
+    def close(self) -> None:
+        """Отключается от сегмента. Ссылки на array после этого использовать нельзя."""
+        self.array = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Кто-то ещё держит view на буфер: отображение освободится вместе с последней ссылкой
+            logger.warning("Сегмент %s ещё используется, закрытие отложено", self.shm.name)
+
+    def unlink(self) -> None:
+        """Закрывает и удаляет сегмент (только для владельца)."""
+        self.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+
+class SharedMemoryTransport:
+    """
+    Набор сегментов разделяемой памяти для одной пакетной задачи.
+
+    Все созданные сегменты удаляются в close()/при выходе из with — в том числе,
+    если воркер упал и пул процессов завершился с BrokenProcessPool.
+    """
+
+    def __init__(self):
+        self.segments: list[SharedArray] = []
+
+    def create(self, shape: tuple, dtype) -> SharedArray:
+        shared = SharedArray.create(shape, dtype)
+        self.segments.append(shared)
+        return shared
+
+    def from_array(self, array: np.ndarray) -> SharedArray:
+        shared = SharedArray.from_array(array)
+        self.segments.append(shared)
+        return shared
+
+    def close(self) -> None:
+        for shared in self.segments:
+            shared.unlink()
+        logger.debug("Разделяемая память освобождена: сегментов=%d", len(self.segments))
+        self.segments = []
+
+    def __enter__(self) -> "SharedMemoryTransport":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()